@@ -0,0 +1,293 @@
+__author__ = 'alefur'
+
+import configparser
+import fnmatch
+import os
+import time
+import weakref
+from collections import deque
+
+import spsGUIActor
+import spsGUIActor.styles as styles
+import spsGUIActor.theme as theme
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt, QObject, pyqtSignal
+from PyQt5.QtWidgets import QDialog, QTableView, QVBoxLayout, QAbstractItemView, QHeaderView
+from spsGUIActor.common import PushButton
+from spsGUIActor.fanout import keyVarValues, isAlive
+from spsGUIActor.history import toFloat
+
+defaultRules = os.path.abspath(os.path.join(os.path.dirname(spsGUIActor.__file__), '../..', 'etc', 'spsalarms.cfg'))
+
+
+class Rule(object):
+    """ Alarm on a single value of a keyword, for every actor matching a glob. State is kept per actor. """
+
+    def __init__(self, name, section):
+        self.name = name
+        self.actor = section.get('actor', '*')
+        self.key = section['key']
+        self.index = section.getint('index', 0)
+        self.severity = section.get('severity', 'warning')
+        self.message = section.get('message', name)
+        self.rawOnly = section.getboolean('rawOnly', False)
+        self.active = dict()
+
+    @staticmethod
+    def fromConfig(name, section):
+        ruleTypes = dict(threshold=ThresholdRule, rate=RateRule, state=StateRule)
+        return ruleTypes[section.get('type', 'threshold')](name, section)
+
+    def matches(self, actor):
+        return fnmatch.fnmatchcase(actor, self.actor)
+
+    def evaluate(self, actor, value, timestamp):
+        """ Update the state of that actor, return True if the alarm is raised. """
+        active = self.isActive(actor, value, timestamp)
+        self.active[actor] = active
+        return active
+
+    def isActive(self, actor, value, timestamp):
+        return False
+
+
+class ThresholdRule(Rule):
+    def __init__(self, name, section):
+        Rule.__init__(self, name, section)
+        self.low = section.getfloat('low', float('-inf'))
+        self.high = section.getfloat('high', float('inf'))
+        self.hysteresis = section.getfloat('hysteresis', 0)
+        self.inclusive = section.getboolean('inclusive', False)
+
+    def isActive(self, actor, value, timestamp):
+        value = toFloat(value)
+        if value is None:
+            return self.active.get(actor, False)
+
+        # once raised, the value needs to be back in range by more than the hysteresis to clear it.
+        margin = self.hysteresis if self.active.get(actor, False) else 0
+        if self.inclusive:
+            return not self.low + margin < value < self.high - margin
+
+        return not self.low + margin <= value <= self.high - margin
+
+
+class RateRule(ThresholdRule):
+    """ Threshold on the rate of change per minute, over a sliding window. """
+
+    def __init__(self, name, section):
+        ThresholdRule.__init__(self, name, section)
+        self.window = section.getfloat('window', 600)
+        self.samples = dict()
+
+    def isActive(self, actor, value, timestamp):
+        value = toFloat(value)
+        samples = self.samples.setdefault(actor, deque())
+
+        if value is not None:
+            samples.append((timestamp, value))
+
+        while len(samples) > 2 and timestamp - samples[1][0] >= self.window:
+            samples.popleft()
+
+        # not enough of a baseline yet to tell a trend from noise.
+        if len(samples) < 2 or samples[-1][0] - samples[0][0] < self.window / 2:
+            return self.active.get(actor, False)
+
+        (start, first), (end, last) = samples[0], samples[-1]
+        return ThresholdRule.isActive(self, actor, (last - first) / (end - start) * 60, timestamp)
+
+
+class StateRule(Rule):
+    def __init__(self, name, section):
+        Rule.__init__(self, name, section)
+        self.good = [value.strip() for value in section.get('good', '').split(',') if value.strip()]
+        self.bad = [value.strip() for value in section.get('bad', '').split(',') if value.strip()]
+
+    def isActive(self, actor, value, timestamp):
+        if value is None:
+            return self.active.get(actor, False)
+
+        value = str(value)
+        return value in self.bad if self.bad else value not in self.good
+
+
+class Alarm(object):
+    def __init__(self, rule, actor, value, timestamp):
+        self.rule = rule
+        self.actor = actor
+        self.value = value
+        self.timestamp = timestamp
+
+
+def loadRules(path):
+    config = configparser.ConfigParser()
+    config.optionxform = str
+    config.read(path)
+
+    return [Rule.fromConfig(name, config[name]) for name in config.sections()]
+
+
+class Alarms(QObject):
+    """ Rules are indexed by keyword, an update only evaluates the rules of that keyword which match its actor. """
+    changed = pyqtSignal()
+
+    def __init__(self, fanout, path=None):
+        QObject.__init__(self)
+        self.fanout = fanout
+        self.rules = dict()
+        self.keys = dict()
+        self.tiles = dict()
+        self.alarms = dict()
+
+        for rule in loadRules(defaultRules if path is None else path):
+            self.rules.setdefault(rule.key, []).append(rule)
+
+    @property
+    def active(self):
+        return sorted(self.alarms.values(), key=lambda alarm: alarm.timestamp)
+
+    @property
+    def stats(self):
+        return dict(rules=sum(len(rules) for rules in self.rules.values()), watched=len(self.keys),
+                    active=len(self.alarms))
+
+    def watchModels(self, models, actorNames):
+        """ Listen to the keywords of every rule from the start, their tiles may only be built with a dialog. """
+        for actor in actorNames:
+            for key, rules in self.rules.items():
+                if not [rule for rule in rules if rule.matches(actor)]:
+                    continue
+                try:
+                    keyvar = models[actor].keyVarDict[key]
+                except KeyError:
+                    continue
+
+                self.listen(keyvar)
+
+    def listen(self, keyvar):
+        key = (keyvar.actor, keyvar.name)
+
+        if key not in self.keys:
+            self.keys[key] = [rule for rule in self.rules.get(keyvar.name, []) if rule.matches(keyvar.actor)]
+            if self.keys[key]:
+                self.fanout.addListener(keyvar, self.newValues)
+                # the keyword may have been received before anything listened to it.
+                self.newValues(keyvar, keyVarValues(keyvar))
+
+        return self.keys[key]
+
+    def watch(self, keyvar, widget, ind):
+        if self.listen(keyvar):
+            self.tiles.setdefault((keyvar.actor, keyvar.name, ind), []).append(weakref.ref(widget))
+            widget.setAlarm(self.severity(keyvar.actor, keyvar.name, ind, widget.isDerived))
+
+    def widgets(self, tileKey):
+        refs = [ref for ref in self.tiles.get(tileKey, []) if isAlive(ref())]
+        self.tiles[tileKey] = refs
+
+        return [ref() for ref in refs]
+
+    def newValues(self, keyvar, values):
+        actor, key = keyvar.actor, keyvar.name
+        timestamp = time.time()
+
+        for rule in self.keys[actor, key]:
+            value = values[rule.index] if rule.index < len(values) else None
+            wasActive = rule.active.get(actor, False)
+
+            if rule.evaluate(actor, value, timestamp) == wasActive:
+                if wasActive:
+                    self.alarms[rule.name, actor].value = value
+                continue
+
+            if wasActive:
+                self.alarms.pop((rule.name, actor))
+            else:
+                self.alarms[rule.name, actor] = Alarm(rule, actor, value, timestamp)
+
+            self.setTiles(actor, rule)
+            self.changed.emit()
+
+    def severity(self, actor, key, ind, isDerived=False):
+        severities = [alarm.rule.severity for alarm in self.alarms.values() if
+                      alarm.actor == actor and alarm.rule.key == key and alarm.rule.index == ind and
+                      not (isDerived and alarm.rule.rawOnly)]
+        return 'error' if 'error' in severities else severities[0] if severities else None
+
+    def setTiles(self, actor, rule):
+        for widget in self.widgets((actor, rule.key, rule.index)):
+            widget.setAlarm(self.severity(actor, rule.key, rule.index, widget.isDerived))
+
+
+class AlarmModel(QAbstractTableModel):
+    columns = ['time', 'actor', 'key', 'value', 'severity', 'message']
+
+    def __init__(self, alarms):
+        QAbstractTableModel.__init__(self)
+        self.alarms = alarms
+        self.rows = alarms.active
+        alarms.changed.connect(self.reload)
+
+    def reload(self):
+        self.beginResetModel()
+        self.rows = self.alarms.active
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(AlarmModel.columns)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return AlarmModel.columns[section]
+
+    def data(self, index, role=Qt.DisplayRole):
+        alarm = self.rows[index.row()]
+
+        if role == Qt.DisplayRole:
+            return [time.strftime('%H:%M:%S', time.localtime(alarm.timestamp)), alarm.actor,
+                    '%s[%d]' % (alarm.rule.key, alarm.rule.index), str(alarm.value), alarm.rule.severity,
+                    alarm.rule.message][index.column()]
+
+
+class AlarmDialog(QDialog):
+    def __init__(self, alarms):
+        QDialog.__init__(self)
+        self.setWindowTitle('Alarms')
+        self.resize(700, 300)
+
+        self.view = QTableView()
+        self.view.setModel(AlarmModel(alarms))
+        self.view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.view.horizontalHeader().setStretchLastSection(True)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.view)
+        self.setLayout(layout)
+
+
+class AlarmButton(PushButton):
+    def __init__(self, alarms):
+        PushButton.__init__(self)
+        self.alarms = alarms
+        self.dialog = None
+        self.clicked.connect(self.showAlarms)
+        alarms.changed.connect(self.refresh)
+        self.refresh()
+
+    def refresh(self):
+        active = self.alarms.active
+        severity = 'error' if 'error' in [alarm.rule.severity for alarm in active] else 'warning' if active else None
+        self.setText('ALARMS (%d)' % len(active))
+
+        theme.apply(self, **dict(zip(['background', 'police'], styles.colorWidget(severity or 'default'))))
+
+    def showAlarms(self):
+        if self.dialog is None:
+            self.dialog = AlarmDialog(self.alarms)
+
+        self.dialog.show()
+        self.dialog.raise_()
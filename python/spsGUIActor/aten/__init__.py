@@ -60,7 +60,7 @@ class AtenRow(ModuleRow):
         self.rows = [RowOne(self), RowTwo(self)]
 
         self.controllers = Controllers(self)
-        self.createDialog(AtenDialog(self))
+        self.createDialog(AtenDialog)
 
     @property
     def widgets(self):
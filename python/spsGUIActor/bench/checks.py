@@ -0,0 +1,315 @@
+__author__ = 'alefur'
+
+import configparser
+import os
+import sys
+import tempfile
+import time
+import traceback
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import spsGUIActor.styles as styles
+from PyQt5.QtWidgets import QApplication
+from spsGUIActor.bench.synthetic import SyntheticGui, makeConfig
+from spsGUIActor.history import History, MappedRing, RingBuffer
+from spsGUIActor.logs import TailedFile, LogTailer, CmdLogArea
+from spsGUIActor.staleness import Staleness
+
+app = None
+
+
+def application():
+    global app
+    app = QApplication.instance() or QApplication(sys.argv)
+    return app
+
+
+def spsWidget(nSm=1, **kwargs):
+    from spsGUIActor.mainwindow import SpsWidget
+
+    application()
+    return SpsWidget(SyntheticGui(makeConfig(nSm, **kwargs)))
+
+
+def checkAddSpecModuleWithCurrentControllers():
+    # rows are built while their controllers keyword is already current, before they have a dialog.
+    mwindow = spsWidget()
+    mwindow.actor.models['enu_sm2'].keyVarDict['controllers'].set(('rexm', 'slit'))
+    specModule = mwindow.addSpecModule(2, enu=True, arms=['b'])
+
+    enuRow = specModule.spec[1]
+    assert enuRow.controllers.available == {'rexm', 'slit'}, enuRow.controllers.available
+    assert enuRow.rexm in enuRow.controllers.index['rexm']
+
+
+def checkFleetRowWithCurrentControllers():
+    # compact view rows are only built on click, long after their keywords became current.
+    mwindow = spsWidget(compactView=True)
+    mwindow.actor.models['xcu_b1'].keyVarDict['controllers'].set(('cooler', 'gatevalve'))
+    fleetRow = mwindow.fleetView.fleetModel.rows[1]
+    fleetRow.showDetails()
+
+    xcuRow = fleetRow.moduleRow.xcu
+    assert xcuRow.controllers.available == {'cooler', 'gatevalve'}, xcuRow.controllers.available
+    assert fleetRow.moduleRow.controlDialog.loaded
+
+
+def checkAlarmRaisedBeforeDialogOpened():
+    # nothing watches hxpSoftwareLimits until the enu dialog is loaded.
+    mwindow = spsWidget()
+    specModule = mwindow.addSpecModule(2, enu=True, arms=[])
+    mwindow.actor.models['enu_sm2'].keyVarDict['hxpSoftwareLimits'].set((0,))
+
+    controlDialog = specModule.spec[1].controlDialog.load()
+    assert ('slitSoftwareLimits', 'enu_sm2') in mwindow.alarms.alarms, mwindow.alarms.alarms
+    assert controlDialog.slitPanel.softwareLimitsActivated.alarm == 'error'
+
+
+def checkAlarmRaisedWithoutTile():
+    # the ionpump errors and slit software limits are only shown in dialogs, which are never opened here.
+    mwindow = spsWidget()
+    mwindow.actor.models['enu_sm1'].keyVarDict['hxpSoftwareLimits'].set((False,))
+    mwindow.actor.models['xcu_r1'].keyVarDict['ionpump2Errors'].set(('pump2', 1, 'overcurrent'))
+
+    assert ('slitSoftwareLimits', 'enu_sm1') in mwindow.alarms.alarms
+    assert ('ionpump2Status', 'xcu_r1') in mwindow.alarms.alarms
+    assert not mwindow.alarms.widgets(('enu_sm1', 'hxpSoftwareLimits', 0))
+
+
+def checkConnectFollowsActorOnline():
+    # rexm stays unavailable, only the actor goes online then offline.
+    mwindow = spsWidget()
+    specModule = mwindow.addSpecModule(2, enu=True, arms=[])
+    connectButton = specModule.spec[1].controlDialog.load().rexmPanel.commands.connectButton
+    actors = mwindow.actor.models['hub'].keyVarDict['actors']
+
+    actors.set(('enu_sm2',))
+    assert connectButton.isEnabled()
+
+    actors.set(('hub',))
+    assert not connectButton.isEnabled()
+
+
+def checkAlarmClearedOnUnchangedValue():
+    # the invalid probe is left out of the mean, which is then the same once the alarm clears.
+    mwindow = spsWidget()
+    for rule in mwindow.alarms.rules['temps']:
+        rule.rawOnly = False
+
+    specModule = mwindow.addSpecModule(2, enu=False, arms=['b'])
+    tile = specModule.cams[0].xcu.temperature
+    mwindow.show()
+    temps = mwindow.actor.models['xcu_b2'].keyVarDict['temps']
+    mwindow.actor.models['hub'].keyVarDict['actors'].set(('xcu_b2',))
+
+    temps.set(tuple([0.] * 10 + [500., 80.]))
+    mwindow.frameScheduler.flush()
+    assert tile.alarm == 'warning' and tile.property('background') == styles.colorWidget('warning')[0]
+
+    temps.set(tuple([0.] * 10 + [80., 80.]))
+    mwindow.frameScheduler.flush()
+    assert tile.alarm is None and tile.property('background') == tile.getStyles(tile.valueText())[0], \
+        tile.property('background')
+
+
+def checkInvalidProbeOnlyColoursProbe():
+    # 400K is already invalid, the detector temperature tile averages the other probe.
+    mwindow = spsWidget()
+    camRow = mwindow.addSpecModule(2, enu=False, arms=['b']).cams[0]
+    camRow.controlDialog.load()
+    probe = [cell for cell in camRow.xcu.controlDialog.tempsPanel.temps if cell.ind == 10][0]
+
+    mwindow.actor.models['xcu_b2'].keyVarDict['temps'].set(tuple([0.] * 10 + [400., 80.]))
+    assert ('detectorTempInvalid', 'xcu_b2') in mwindow.alarms.alarms
+    assert probe.alarm == 'warning' and camRow.xcu.temperature.alarm is None
+
+
+def checkSparklineMovesOnSteadyValue():
+    # the pressure is received once, its bucket is complete long before the tile is rendered again.
+    mwindow = spsWidget()
+    tile = mwindow.addSpecModule(2, enu=False, arms=['b']).cams[0].xcu.pressure
+    mwindow.show()
+    application().processEvents()
+    sparkline = tile.sparkline
+    assert sparkline.timer.isActive() and sparkline.timer.interval() == int(sparkline.bucketWidth * 1000)
+
+    now = time.time()
+    mwindow.history.append(('xcu_b2', 'pressure', 0), now, 1e-7)
+    sparkline.reset()
+    assert sparkline.curve.lastBucket is None
+
+    clock = time.time
+    time.time = lambda: now + 2 * sparkline.bucketWidth
+    try:
+        sparkline.timer.timeout.emit()
+    finally:
+        time.time = clock
+
+    assert sparkline.curve.lastBucket == int(now // sparkline.bucketWidth), sparkline.curve.lastBucket
+
+    mwindow.hide()
+    assert not sparkline.timer.isActive()
+
+
+class StaleProbe(object):
+    isStale = None
+
+    def setStale(self, isStale):
+        self.isStale = isStale
+
+
+def checkStalenessTrackedAfterUpdate():
+    # pressure was received once before anything tracked it, and never again.
+    mwindow = spsWidget()
+    config = configparser.ConfigParser()
+    config.read_dict(dict(staleness=dict(pressure=1)))
+    staleness = Staleness(mwindow.fanout, config)
+
+    keyvar = mwindow.actor.models['xcu_b1'].keyVarDict['pressure']
+    keyvar.set((1e-7,))
+    first = StaleProbe()
+    staleness.track(keyvar, first)
+    assert first.isStale is False and ('xcu_b1', 'pressure') in staleness.wheel
+
+    time.sleep(2 * Staleness.resolution + 0.2)
+    staleness.tick()
+    assert first.isStale
+
+    second = StaleProbe()
+    staleness.track(keyvar, second)
+    assert second.isStale
+
+
+def checkHistoryWindowDoesNotListDirectory():
+    directory = tempfile.mkdtemp()
+    os.makedirs(os.path.join(directory, '2020-01-01'))
+    history = History(None, capacity=16, directory=directory)
+    history.append(('xcu_b1', 'pressure', 0), time.time(), 1e-7)
+
+    listdir, calls = os.listdir, []
+    os.listdir = lambda path: calls.append(path) or listdir(path)
+    try:
+        for i in range(10):
+            timestamps, values = history.window('xcu_b1', 'pressure', 0, start=0)
+    finally:
+        os.listdir = listdir
+
+    assert not calls and list(values) == [1e-7], calls
+    assert history.nights() == ['2020-01-01']
+
+
+def checkHistoryNightWrittenByOneGui():
+    # a second gui on the same host must not write the mapped files of the first one.
+    directory = tempfile.mkdtemp()
+    first, second = History(None, capacity=16, directory=directory), History(None, capacity=16, directory=directory)
+    seriesKey = ('xcu_b1', 'pressure', 0)
+
+    first.append(seriesKey, time.time(), 1.)
+    second.append(seriesKey, time.time(), 2.)
+
+    assert isinstance(first.get(*seriesKey), MappedRing) and type(second.get(*seriesKey)) is RingBuffer
+    assert list(first.window(*seriesKey)[1]) == [1.] and list(second.window(*seriesKey)[1]) == [2.]
+
+
+def checkTailedPartialLineAcrossRotation():
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'current.log')
+
+    with open(path, 'wb') as file:
+        file.write(b'start\nabc')
+
+    tailed = TailedFile(path)
+    tailed.open(fromEnd=True)
+    assert tailed.readLines() == []
+
+    os.rename(path, os.path.join(directory, 'previous.log'))
+    assert tailed.readLines() == []
+
+    with open(path, 'wb') as file:
+        file.write(b'def\n')
+
+    assert tailed.readLines() == ['abcdef'], tailed.partial
+
+
+def checkTailedFileCreatedAfterSubscription():
+    # a log area can be shown before its actor wrote current.log, e.g. right after the night rollover.
+    application()
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'current.log')
+    received = []
+
+    tailer = LogTailer()
+    assert tailer.subscribe(path, received.extend) == []
+    assert tailer.position(path) is None
+
+    with open(path, 'wb') as file:
+        file.write(b'first\nsec')
+
+    tailer.poll()
+    assert received == ['first'] and tailer.position(path)[1] == len(b'first\n'), received
+
+
+def checkTailerUnwatchesDirectory():
+    application()
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'current.log')
+    open(path, 'wb').close()
+
+    tailer = LogTailer()
+    callback = lambda lines: None
+    tailer.subscribe(path, callback)
+    assert directory in tailer.watcher.directories()
+
+    tailer.unsubscribe(path, callback)
+    assert not tailer.watcher.directories() and not tailer.watcher.files()
+
+
+def checkLogViewScrollsHorizontally():
+    application()
+    logArea = CmdLogArea()
+    logArea.show()
+
+    logArea.newLine('short')
+    logArea.newLine('x' * 400)
+    logArea.logModel.flush()
+    app.processEvents()
+
+    assert logArea.horizontalScrollBar().maximum() > 0
+    assert logArea.visualRect(logArea.logModel.index(0)).width() > logArea.viewport().width()
+
+
+checks = [checkAddSpecModuleWithCurrentControllers,
+          checkFleetRowWithCurrentControllers,
+          checkAlarmRaisedBeforeDialogOpened,
+          checkAlarmRaisedWithoutTile,
+          checkConnectFollowsActorOnline,
+          checkAlarmClearedOnUnchangedValue,
+          checkInvalidProbeOnlyColoursProbe,
+          checkSparklineMovesOnSteadyValue,
+          checkStalenessTrackedAfterUpdate,
+          checkHistoryWindowDoesNotListDirectory,
+          checkHistoryNightWrittenByOneGui,
+          checkTailedPartialLineAcrossRotation,
+          checkTailedFileCreatedAfterSubscription,
+          checkTailerUnwatchesDirectory,
+          checkLogViewScrollsHorizontally]
+
+
+def main():
+    failed = 0
+
+    for check in checks:
+        try:
+            check()
+            print('%-50s ok' % check.__name__)
+        except Exception:
+            failed += 1
+            print('%-50s FAILED' % check.__name__)
+            traceback.print_exc()
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+__author__ = 'alefur'
+
+import argparse
+import random
+import time
+
+from twisted.internet import reactor
+from twisted.internet.protocol import ServerFactory
+from twisted.internet.task import LoopingCall
+from twisted.protocols.basic import LineReceiver
+from spsGUIActor.layout import specModuleModels
+
+
+class Stream(object):
+    def __init__(self, actor, key, rate, generate):
+        self.actor = actor
+        self.key = key
+        self.period = 1.0 / rate
+        self.generate = generate
+        self.due = 0
+
+
+class KeywordSynth(object):
+    # nominal update rates in Hz, multiplied by the rate factor.
+    rates = dict(temps=0.2, pressure=0.5, ionpump=0.2, coolerTemps=0.2, turboSpeed=0.5, ccdTemps=0.2,
+                 exposureState=0.1, readRows=10)
+    readoutRows = 4176
+
+    def __init__(self, nSm=1, arms=('b', 'r'), rate=1.0, seed=0):
+        self.nSm = nSm
+        self.arms = list(arms)
+        self.rate = rate
+        self.random = random.Random(seed)
+        self.readRows = dict()
+        self.streams = []
+
+        for smId in range(1, nSm + 1):
+            for arm in self.arms:
+                self.addCamera(smId, arm)
+
+        # spread the first updates over one period, like actors started at different times.
+        for stream in self.streams:
+            stream.due = self.random.uniform(0, stream.period)
+
+    @property
+    def actors(self):
+        return ['hub', 'spsgui'] + sum([specModuleModels(smId, True, self.arms) for smId in range(1, self.nSm + 1)], [])
+
+    def addStream(self, actor, key, rateKey, generate):
+        self.streams.append(Stream(actor, key, KeywordSynth.rates[rateKey] * self.rate, generate))
+
+    def addCamera(self, smId, arm):
+        # named as the gui models, the nir detector is an hx actor which has no ccdTemps or readRows.
+        xcu, detector = specModuleModels(smId, False, [arm])
+        self.addStream(xcu, 'temps', 'temps', lambda: self.floats(12, 160, 5))
+        self.addStream(xcu, 'pressure', 'pressure', lambda: '%g' % self.random.uniform(1e-7, 2e-7))
+        for pumpId in [1, 2]:
+            self.addStream(xcu, 'ionpump%d' % pumpId, 'ionpump',
+                           lambda: '1,%d,%g,%.1f,%g' % (self.random.randint(5000, 5600), self.random.uniform(1e-7, 1e-6),
+                                                        self.random.uniform(20, 30), self.random.uniform(1e-7, 2e-7)))
+        self.addStream(xcu, 'coolerTemps', 'coolerTemps', lambda: '163.0,%s,70' % self.floats(2, 100, 65))
+        self.addStream(xcu, 'turboSpeed', 'turboSpeed', lambda: '%d' % self.random.randint(89900, 90100))
+        self.addStream(detector, 'exposureState', 'exposureState', lambda: self.exposureState(detector))
+
+        if detector.startswith('ccd'):
+            self.addStream(detector, 'ccdTemps', 'ccdTemps', lambda: self.floats(3, 160, 10))
+            self.addStream(detector, 'readRows', 'readRows', lambda: self.readRow(detector))
+
+    def floats(self, nValue, center, spread):
+        return ','.join('%.3f' % self.random.uniform(center - spread, center + spread) for i in range(nValue))
+
+    def exposureState(self, ccd):
+        state = self.random.choice(['idle', 'integrating', 'reading'])
+        self.readRows[ccd] = 0 if state == 'reading' else None
+        return state
+
+    def readRow(self, ccd):
+        row = self.readRows.get(ccd)
+        if row is None:
+            return None
+
+        self.readRows[ccd] = min(row + KeywordSynth.readoutRows // 100, KeywordSynth.readoutRows)
+        return '%d,%d' % (self.readRows[ccd], KeywordSynth.readoutRows)
+
+    def due(self, now):
+        # now is the time elapsed since the hub started, a stream late by more than a period is not caught up.
+        for stream in self.streams:
+            if stream.due > now:
+                continue
+
+            stream.due = max(stream.due + stream.period, now)
+            value = stream.generate()
+            if value is not None:
+                yield stream.actor, '%s=%s' % (stream.key, value)
+
+    def status(self, actor):
+        for stream in self.streams:
+            value = stream.generate() if stream.actor == actor else None
+            if value is not None:
+                yield '%s=%s' % (stream.key, value)
+
+
+class FakeHubProtocol(LineReceiver):
+    delimiter = b'\n'
+
+    def connectionMade(self):
+        self.factory.clients.append(self)
+        self.reply(0, 'hub', 'i', 'actors=%s' % ','.join(self.factory.synth.actors))
+
+    def connectionLost(self, reason):
+        self.factory.clients.remove(self)
+
+    def lineReceived(self, line):
+        # cmdr protocol : "cmdId actor cmdStr"
+        try:
+            cmdId, actor, cmdStr = line.decode('latin-1').strip().split(' ', 2)
+            cmdId = int(cmdId)
+        except ValueError:
+            return
+
+        self.factory.nCommands += 1
+        if actor not in self.factory.synth.actors:
+            self.reply(cmdId, actor, 'f', 'text="unknown actor"')
+            return
+
+        if cmdStr.split()[:1] == ['status']:
+            for keywords in self.factory.synth.status(actor):
+                self.reply(cmdId, actor, 'i', keywords)
+
+        self.reply(cmdId, actor, ':', '')
+
+    def reply(self, cmdId, actor, code, keywords):
+        self.sendLine(('%s %d %s %s %s' % (self.factory.cmdrName, cmdId, actor, code, keywords)).encode('latin-1'))
+
+
+class FakeHub(ServerFactory):
+    protocol = FakeHubProtocol
+    tickInterval = 0.02
+
+    def __init__(self, synth, cmdrName='spsgui'):
+        self.synth = synth
+        self.cmdrName = cmdrName
+        self.clients = []
+        self.nCommands = 0
+        self.nReplies = 0
+        self.startTime = None
+        self.loop = LoopingCall(self.tick)
+
+    def startFactory(self):
+        self.startTime = time.monotonic()
+        self.loop.start(FakeHub.tickInterval)
+
+    def stopFactory(self):
+        if self.loop.running:
+            self.loop.stop()
+
+    def tick(self):
+        for actor, keywords in self.synth.due(time.monotonic() - self.startTime):
+            self.nReplies += 1
+            for client in self.clients:
+                client.reply(0, actor, 'i', keywords)
+
+
+def listen(synth, port=0, interface='localhost', cmdrName='spsgui'):
+    hub = FakeHub(synth, cmdrName=cmdrName)
+    return hub, reactor.listenTCP(port, hub, interface=interface)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='stand-in tron hub, point [tron] tronHost/tronCmdrPort at it')
+    parser.add_argument('--port', default=6093, type=int, help='cmdr port to listen on')
+    parser.add_argument('--sm', default=1, type=int, help='number of spectrograph modules')
+    parser.add_argument('--arms', default='b,r', type=str, help='camera arms per module')
+    parser.add_argument('--rate', default=1.0, type=float, help='factor on the nominal keyword rates')
+    parser.add_argument('--cmdr', default='spsgui', type=str, help='commander name replies are sent to')
+    args = parser.parse_args()
+
+    synth = KeywordSynth(nSm=args.sm, arms=[arm.strip() for arm in args.arms.split(',') if arm], rate=args.rate)
+    hub, port = listen(synth, port=args.port, cmdrName=args.cmdr)
+    print('fake hub on port %d : %d actors, %d keyword streams' % (port.getHost().port, len(synth.actors),
+                                                                    len(synth.streams)))
+    reactor.run()
+
+
+if __name__ == '__main__':
+    main()
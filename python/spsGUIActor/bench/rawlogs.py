@@ -0,0 +1,108 @@
+__author__ = 'alefur'
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtWidgets import QApplication
+from spsGUIActor.logs import LogTailer, RawLogArea
+
+codes = ['i', 'i', 'i', 'd', 'w', ':', 'f']
+
+
+def generateLogs(root, actors, nbline):
+    for actor in actors:
+        directory = os.path.join(root, 'actors', actor)
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, 'current.log'), 'w') as logfile:
+            for i in range(nbline):
+                fields = ['2020-01-01', '00:00:%02d.%03dZ' % (i % 60, i % 1000)] + ['f%d' % j for j in range(18)]
+                logfile.write('%s %s %s\n' % (' '.join(fields), codes[i % len(codes)], 'key%d=%d' % (i % 50, i)))
+
+
+def logActors(root):
+    directory = os.path.join(root, 'actors')
+    return sorted(actor for actor in os.listdir(directory)
+                  if os.path.isfile(os.path.join(directory, actor, 'current.log')))
+
+
+def drain(app, logAreas):
+    while any(logArea.backlog for logArea in logAreas):
+        app.processEvents()
+
+
+def startup(app, actors, nDialog, eager):
+    tailer = LogTailer()
+    start = time.perf_counter()
+    # each control dialog builds one log area per actor, camera dialogs build two.
+    logAreas = [RawLogArea(tailer, actor) for i in range(nDialog) for actor in actors]
+
+    if eager:
+        # what every area used to do at construction time.
+        for logArea in logAreas:
+            logArea.show()
+        drain(app, logAreas)
+
+    elapsed = time.perf_counter() - start
+
+    for logArea in logAreas:
+        logArea.close()
+
+    return elapsed
+
+
+def firstShow(app, actor):
+    logArea = RawLogArea(LogTailer(), actor)
+    start = time.perf_counter()
+    logArea.show()
+    app.processEvents()
+    visible = time.perf_counter() - start
+
+    longest = 0
+    while logArea.backlog:
+        start = time.perf_counter()
+        app.processEvents()
+        longest = max(longest, time.perf_counter() - start)
+
+    logArea.close()
+    return visible, longest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='startup cost of raw log areas, eager vs deferred loading')
+    parser.add_argument('--dialogs', default=1, type=int, help='number of dialogs per actor')
+    parser.add_argument('--generate', default=0, type=int,
+                        help='write that many lines of synthetic logs if $ICS_MHS_LOGS_ROOT is not set')
+    args = parser.parse_args()
+
+    if 'ICS_MHS_LOGS_ROOT' not in os.environ:
+        if not args.generate:
+            parser.error('$ICS_MHS_LOGS_ROOT is not set, use --generate to benchmark on synthetic logs')
+
+        os.environ['ICS_MHS_LOGS_ROOT'] = tempfile.mkdtemp(prefix='spsgui')
+        actors = ['enu_sm%d' % smId for smId in range(1, 5)]
+        actors += ['%s_%s%d' % (prefix, arm, smId) for prefix in ['xcu', 'ccd'] for arm in 'brn' for smId in
+                   range(1, 5)]
+        generateLogs(os.environ['ICS_MHS_LOGS_ROOT'], actors, args.generate)
+
+    app = QApplication(sys.argv)
+    actors = logActors(os.environ['ICS_MHS_LOGS_ROOT'])
+
+    eager = startup(app, actors, args.dialogs, eager=True)
+    deferred = startup(app, actors, args.dialogs, eager=False)
+    visible, longest = firstShow(app, actors[0])
+
+    print('%d actor logs in %s' % (len(actors), os.environ['ICS_MHS_LOGS_ROOT']))
+    print('%-18s %10.1f ms' % ('eager startup', eager * 1e3))
+    print('%-18s %10.1f ms' % ('deferred startup', deferred * 1e3))
+    print('%-18s %10.1f ms' % ('first chunk shown', visible * 1e3))
+    print('%-18s %10.1f ms' % ('longest chunk', longest * 1e3))
+    print('startup speedup : %.1fx' % (eager / deferred))
+
+
+if __name__ == '__main__':
+    main()
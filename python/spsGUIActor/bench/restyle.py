@@ -0,0 +1,110 @@
+__author__ = 'alefur'
+
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import spsGUIActor.styles as styles
+import spsGUIActor.theme as theme
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QApplication, QGroupBox, QLabel, QWidget
+from spsGUIActor.common import GridLayout
+
+# Rough count of value widgets built for one spectrograph module: the main window rows plus the ENU and the
+# three camera dialogs.
+tilesPerSm = 330
+states = ['ok', 'off', 'busy', 'nan', 'failed', 'offline']
+
+
+class Tile(QGroupBox):
+    def __init__(self, fontSize=styles.smallFont):
+        QGroupBox.__init__(self)
+        self.fontSize = fontSize
+        self.setTitle('tile')
+        self.grid = GridLayout()
+        self.value = QLabel('0')
+        self.grid.addWidget(self.value, 0, 0)
+        self.setLayout(self.grid)
+
+    def setLegacyColor(self, background, police):
+        col1, col2 = styles.colormap(background)
+        bckColor = 'qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1, stop: 0  %s, stop: 1 %s)' % (col1, col2)
+        fontSize = max(8, round(0.85 * self.fontSize))
+        self.setStyleSheet(
+            "QGroupBox {font-size: %ipt; background-color: %s ;border: 1px solid gray;border-radius: 3px;margin-top: 1ex;} " % (
+                fontSize, bckColor) +
+            "QGroupBox::title {subcontrol-origin: margin;subcontrol-position: top center; padding: 0 0px;}")
+        self.value.setStyleSheet(
+            "QLabel{font-size: %ipt; qproperty-alignment: AlignCenter; color:%s;}" % (self.fontSize, police))
+
+    def initTheme(self):
+        theme.apply(self, theme='true', fontPt='%d' % theme.groupBoxFont(self.fontSize))
+        self.value.setAlignment(Qt.AlignCenter)
+        self.value.setFont(theme.font(self.fontSize))
+
+    def setThemeColor(self, background, police):
+        theme.apply(self, background=background)
+        theme.setPolice(self.value, police)
+
+
+def buildLayout(app, nTiles):
+    window = QWidget()
+    grid = GridLayout()
+    tiles = [Tile() for i in range(nTiles)]
+    for i, tile in enumerate(tiles):
+        grid.addWidget(tile, i // 40, i % 40)
+
+    window.setLayout(grid)
+    window.show()
+    app.processEvents()
+    return window, tiles
+
+
+def restyle(app, tiles, setColor, nPass):
+    styleTime, paintTime = 0, 0
+
+    for iPass in range(nPass):
+        start = time.perf_counter()
+        for i, tile in enumerate(tiles):
+            setColor(tile, *styles.colorWidget(states[(i + iPass) % len(states)]))
+        styleTime += time.perf_counter() - start
+
+        start = time.perf_counter()
+        app.processEvents()
+        paintTime += time.perf_counter() - start
+
+    return styleTime / (nPass * len(tiles)), paintTime / nPass
+
+
+def main():
+    parser = argparse.ArgumentParser(description='compare per-update stylesheet building with the theme engine')
+    parser.add_argument('--sm', default=12, type=int, help='number of spectrograph modules')
+    parser.add_argument('--npass', default=10, type=int, help='number of full restyle passes')
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    nTiles = args.sm * tilesPerSm
+
+    window, tiles = buildLayout(app, nTiles)
+    before = restyle(app, tiles, Tile.setLegacyColor, args.npass)
+    window.close()
+
+    theme.install(app)
+    window, tiles = buildLayout(app, nTiles)
+    for tile in tiles:
+        tile.initTheme()
+    after = restyle(app, tiles, Tile.setThemeColor, args.npass)
+    window.close()
+
+    print('%d SMs, %d tiles, %d passes' % (args.sm, nTiles, args.npass))
+    print('%-18s %14s %14s' % ('', 'us/restyle', 'ms/repaint'))
+    print('%-18s %14.1f %14.1f' % ('inline stylesheet', before[0] * 1e6, before[1] * 1e3))
+    print('%-18s %14.1f %14.1f' % ('theme properties', after[0] * 1e6, after[1] * 1e3))
+    print('restyle speedup : %.1fx' % (before[0] / after[0]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+__author__ = 'alefur'
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import numpy as np
+from PyQt5.QtCore import QObject, QEvent, QTimer
+from PyQt5.QtWidgets import QApplication, QLabel
+from spsGUIActor.bench.synthetic import SyntheticGui, makeConfig, parseValues
+
+scenarios = dict(sm1=dict(nSm=1, dialogs=False),
+                 sm4=dict(nSm=4, dialogs=False),
+                 sm12=dict(nSm=12, dialogs=False),
+                 sm12dialogs=dict(nSm=12, dialogs=True),
+                 sm12compact=dict(nSm=12, dialogs=False, compactView=True))
+
+metrics = [('startup_ms', 'startup (ms)'),
+           ('dialogs_ms', 'dialogs (ms)'),
+           ('rss_mb', 'rss (MB)'),
+           ('latency_p50_ms', 'latency p50 (ms)'),
+           ('latency_p99_ms', 'latency p99 (ms)'),
+           ('max_updates_per_s', 'max updates/s'),
+           ('unchanged_pct', 'unchanged (%)')]
+
+
+class PaintProbe(QObject):
+    """ Timestamps completed paints of the value labels, against the last update of their keyvar. """
+
+    def __init__(self, tiles):
+        QObject.__init__(self)
+        self.tiles = dict()
+        self.latencies = []
+
+        for tile in tiles:
+            self.tiles[tile.value] = [tile, tile.value.text()]
+            tile.value.installEventFilter(self)
+
+    def eventFilter(self, label, event):
+        if event.type() != QEvent.Paint or label not in self.tiles:
+            return False
+
+        label.event(event)
+        done = time.perf_counter()
+
+        tile, lastText = self.tiles[label]
+        if label.text() != lastText and tile.keyvar.lastSet is not None:
+            self.latencies.append(done - tile.keyvar.lastSet)
+            self.tiles[label][1] = label.text()
+
+        return True
+
+
+class LoopLag(QObject):
+    interval = 0.01
+
+    def __init__(self):
+        QObject.__init__(self)
+        self.lags = []
+        self.last = None
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.tick)
+
+    def start(self):
+        self.lags = []
+        self.last = time.perf_counter()
+        self.timer.start(int(LoopLag.interval * 1000))
+
+    def stop(self):
+        self.timer.stop()
+
+    def tick(self):
+        now = time.perf_counter()
+        self.lags.append(max(0, now - self.last - LoopLag.interval))
+        self.last = now
+
+
+class Driver(object):
+    """ Sets the subscribed keyvars in turn, at a given total rate, with values from the fake hub synthesiser. """
+    tickInterval = 0.005
+
+    def __init__(self, keyvars, generators):
+        self.updates = list(zip(keyvars, generators))
+        self.nSent = 0
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.tick)
+
+    def run(self, app, rate, duration):
+        self.rate = rate
+        self.nSent = 0
+        self.start = time.perf_counter()
+        self.timer.start(int(Driver.tickInterval * 1000))
+
+        while time.perf_counter() - self.start < duration:
+            app.processEvents()
+
+        self.timer.stop()
+        return self.nSent / (time.perf_counter() - self.start)
+
+    def tick(self):
+        due = int((time.perf_counter() - self.start) * self.rate) - self.nSent
+
+        for i in range(due):
+            keyvar, generate = self.updates[self.nSent % len(self.updates)]
+            value = generate()
+            if value is not None:
+                keyvar.set(parseValues(value))
+            self.nSent += 1
+
+
+def rss():
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def processEvents(app, duration):
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        app.processEvents()
+
+
+def runScenario(nSm, dialogs, latencyRate, duration, rates, stepDuration, compactView=False):
+    from spsGUIActor.bench.fakeHub import KeywordSynth
+    from spsGUIActor.mainwindow import SpsWidget
+    from spsGUIActor.module import Module
+    from spsGUIActor.widgets import ValueGB
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    gui = SyntheticGui(makeConfig(nSm, compactView=compactView))
+
+    start = time.perf_counter()
+    spsWidget = SpsWidget(gui)
+    spsWidget.show()
+    app.processEvents()
+    startup = time.perf_counter() - start
+
+    synth = KeywordSynth(nSm=nSm, arms='brn')
+    models = gui.actor.models
+    models['hub'].keyVarDict['actors'].set(tuple(synth.actors + ['dcb', 'rough1', 'aten', 'sac', 'breva']))
+
+    start = time.perf_counter()
+    if dialogs:
+        mainLayout = spsWidget.mainLayout
+        modules = [mainLayout.itemAt(i).widget() for i in range(mainLayout.count())]
+        for module in [module for module in modules if isinstance(module, Module)]:
+            # secondary rows (eg dcb RowOne) share the dialog of their main row.
+            for row in [row for row in module.rows if hasattr(row, 'showDetails')]:
+                row.showDetails()
+        app.processEvents()
+
+    dialogsTime = time.perf_counter() - start
+    processEvents(app, 0.5)
+
+    # only drive what is actually displayed.
+    streams = [stream for stream in synth.streams if models[stream.actor].keyVarDict[stream.key].callbacks]
+    driver = Driver([models[stream.actor].keyVarDict[stream.key] for stream in streams],
+                    [stream.generate for stream in streams])
+
+    tiles = [widget for widget in app.allWidgets() if isinstance(widget, ValueGB) and widget.isVisible()
+             and isinstance(getattr(widget, 'value', None), QLabel)]
+    probe = PaintProbe(tiles)
+    driver.run(app, latencyRate, duration)
+    latencies = np.array(probe.latencies) * 1e3
+
+    loopLag = LoopLag()
+    maxRate = 0
+    for rate in rates:
+        loopLag.start()
+        achieved = driver.run(app, rate, stepDuration)
+        loopLag.stop()
+        if achieved < 0.9 * rate or np.percentile(loopLag.lags, 99) > 0.05:
+            break
+        maxRate = rate
+
+    stats = spsWidget.frameScheduler.stats
+    pushed = stats['hits'] + stats['misses']
+
+    return dict(startup_ms=startup * 1e3,
+                dialogs_ms=dialogsTime * 1e3,
+                rss_mb=rss(),
+                latency_p50_ms=float(np.percentile(latencies, 50)) if len(latencies) else None,
+                latency_p99_ms=float(np.percentile(latencies, 99)) if len(latencies) else None,
+                latency_samples=len(latencies),
+                max_updates_per_s=maxRate,
+                unchanged_pct=100 * stats['hits'] / pushed if pushed else None,
+                tiles=len(tiles),
+                streams=len(streams))
+
+
+def gitVersion():
+    directory = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=directory).decode().strip()
+        dirty = subprocess.call(['git', 'diff', '--quiet', 'HEAD'], cwd=directory) != 0
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+    return '%s%s' % (commit, '-dirty' if dirty else '')
+
+
+def printResults(results, baseline=None):
+    header = '%-14s' % 'scenario' + ''.join('%20s' % label for key, label in metrics)
+    print(header)
+
+    for name, result in results['scenarios'].items():
+        cells = []
+        for key, label in metrics:
+            value = result.get(key)
+            cell = '-' if value is None else '%.1f' % value
+            before = None if baseline is None else baseline['scenarios'].get(name, {}).get(key)
+            if before and value is not None:
+                cell += ' (%+.0f%%)' % ((value - before) / before * 100)
+            cells.append('%20s' % cell)
+
+        print('%-14s' % name + ''.join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='keyword to paint latency and throughput of the full widget tree')
+    parser.add_argument('--scenario', default=None, type=str, choices=sorted(scenarios),
+                        help='run a single scenario in this process and print its json result')
+    parser.add_argument('--only', default=','.join(scenarios), type=str, help='comma separated scenarios to run')
+    parser.add_argument('--duration', default=5.0, type=float, help='latency measurement duration (s)')
+    parser.add_argument('--rate', default=500, type=int, help='update rate of the latency measurement (Hz)')
+    parser.add_argument('--step', default=2.0, type=float, help='duration of each throughput step (s)')
+    parser.add_argument('--output', default=None, type=str, help='json file, default to bench-<commit>.json')
+    parser.add_argument('--compare', default=None, type=str, help='json file of a previous run')
+    args = parser.parse_args()
+
+    rates = [500 * 2 ** i for i in range(10)]
+
+    if args.scenario is not None:
+        result = runScenario(latencyRate=args.rate, duration=args.duration, rates=rates, stepDuration=args.step,
+                             **scenarios[args.scenario])
+        print(json.dumps(result))
+        return
+
+    # one process per scenario, so that startup time and memory are not polluted by the previous ones.
+    version = gitVersion()
+    results = dict(commit=version, date=time.strftime('%Y-%m-%dT%H:%M:%S'), scenarios=dict())
+
+    for name in [name.strip() for name in args.only.split(',') if name.strip()]:
+        cmd = [sys.executable, '-m', 'spsGUIActor.bench.suite', '--scenario', name, '--duration', str(args.duration),
+               '--rate', str(args.rate), '--step', str(args.step)]
+        output = subprocess.check_output(cmd, stderr=subprocess.DEVNULL).decode()
+        results['scenarios'][name] = json.loads(output.strip().split('\n')[-1])
+
+    output = 'bench-%s.json' % version if args.output is None else args.output
+    with open(output, 'w') as outFile:
+        json.dump(results, outFile, indent=2)
+
+    baseline = None
+    if args.compare is not None:
+        with open(args.compare) as inFile:
+            baseline = json.load(inFile)
+
+    print('commit %s%s, results in %s' % (version, '' if baseline is None else ' vs %s' % baseline['commit'], output))
+    printResults(results, baseline=baseline)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+__author__ = 'alefur'
+
+import configparser
+import time
+
+
+def parseValues(valueStr):
+    values = []
+
+    for value in valueStr.split(','):
+        for cast in [int, float]:
+            try:
+                value = cast(value)
+                break
+            except ValueError:
+                pass
+        values.append(value)
+
+    return tuple(values)
+
+
+def makeConfig(nSm, arms='b,r,n', aitActors='dcb,rough1,aten,sac,breva', frameRate=20, compactView=False):
+    config = configparser.ConfigParser()
+    config.read_dict(dict(spsgui=dict(frameRate=frameRate, datadir='/tmp/spsgui', spillHistory=False,
+                                      compactView=compactView),
+                          ait=dict(actors=aitActors)))
+
+    for smId in range(1, nSm + 1):
+        config.read_dict({'sm%d' % smId: dict(arms=arms, enu='True')})
+
+    return config
+
+
+class SyntheticKeyVar(object):
+    """ Mimics the part of opscore KeyVar used by the widgets, values are set directly by the benchmark. """
+
+    def __init__(self, actor, name):
+        self.actor = actor
+        self.name = name
+        self.callbacks = []
+        self.values = ()
+        self.isCurrent = False
+        self.lastSet = None
+
+    def __contains__(self, value):
+        return value in self.values
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def addCallback(self, callback, callNow=False):
+        self.callbacks.append(callback)
+        if callNow:
+            callback(self)
+
+    def removeCallback(self, callback, doRaise=True):
+        if callback in self.callbacks:
+            self.callbacks.remove(callback)
+
+    def getValue(self, doRaise=True):
+        return self.values[0] if len(self.values) == 1 else self.values
+
+    def set(self, values):
+        self.values = values
+        self.isCurrent = True
+        self.lastSet = time.perf_counter()
+
+        for callback in list(self.callbacks):
+            callback(self)
+
+
+class SyntheticKeyVarDict(dict):
+    def __init__(self, actor):
+        dict.__init__(self)
+        self.actor = actor
+
+    def __missing__(self, key):
+        keyvar = self[key] = SyntheticKeyVar(self.actor, key)
+        return keyvar
+
+
+class SyntheticModel(object):
+    def __init__(self, actor):
+        self.actor = actor
+        self.keyVarDict = SyntheticKeyVarDict(actor)
+
+
+class SyntheticModels(dict):
+    def __missing__(self, actor):
+        model = self[actor] = SyntheticModel(actor)
+        return model
+
+
+class SyntheticActor(object):
+    def __init__(self, config):
+        self.config = config
+        self.models = SyntheticModels()
+        self.shuttingDown = False
+        self.cmdr = None
+
+    def addModels(self, modelNames):
+        for name in modelNames:
+            self.models[name]
+
+
+class SyntheticGui(object):
+    def __init__(self, config):
+        self.actor = SyntheticActor(config)
+        self.isConnected = True
@@ -121,7 +121,7 @@ class BrevaRow(ModuleRow):
         self.motorState = MotorState(self)
         self.error = ValueMRow(self, 'error', 'ERROR', 0, '{:g}')
         self.fiberTargeted = ValueMRow(self, 'targetedFiber', 'Fiber', 0, '{:s}')
-        self.createDialog(BrevaDialog(self))
+        self.createDialog(BrevaDialog)
 
     @property
     def widgets(self):
@@ -14,6 +14,7 @@ class CamDevice(QGroupBox):
     def __init__(self, controlDialog, controllerName, title=None):
         title = controllerName.capitalize() if title is None else title
         self.controllerName = controllerName
+        self.availability = None
 
         QGroupBox.__init__(self)
         self.controlDialog = controlDialog
@@ -65,6 +66,12 @@ from spsGUIActor.cam.hx import HxRow
 from spsGUIActor.cam.xcu import XcuRow
 
 
+def camStatusNode(mwindow, xcuName, detectorName):
+    # 0 offline, 1 only one of the detector and xcu actors online, 2 both.
+    online = [mwindow.onlineState.node(xcuName), mwindow.onlineState.node(detectorName)]
+    return mwindow.derived.derived(('camStatus', xcuName), online, lambda *online: sum(online))
+
+
 class CamStatus(ActorGB, QGroupBox):
     def __init__(self, cam):
         self.cam = cam
@@ -79,10 +86,14 @@ class CamStatus(ActorGB, QGroupBox):
         self.grid.addWidget(self.button, 0, 0)
         self.grid.setContentsMargins(0, 0, 0, 0)
         self.setLayout(self.grid)
+        self.initTheme()
 
         self.setColor(*styles.colorWidget('offline'))
         self.setText(cam.label)
 
+    def setValue(self, status):
+        self.setStatus(status)
+
     def setStatus(self, status):
         if status == 0:
             self.setColor(*styles.colorWidget('offline'))
@@ -104,15 +115,36 @@ class CamRow(ModuleRow):
         self.detector = DetectorRow(self)
         self.xcu = XcuRow(self)
 
-        self.createDialog(CamDialog(self))
+        self.status = camStatusNode(self.mwindow, self.xcu.actorName, self.detector.actorName)
+        self.mwindow.derived.subscribe(self.status, self.actorStatus, callNow=True)
+
+        self.createDialog(CamDialog)
 
     @property
     def displayed(self):
         return [self.actorStatus, self.xcu.cryoMode, self.detector.substate, self.xcu.temperature, self.xcu.pressure, self.xcu.twoIonPumps]
 
+    @property
+    def rows(self):
+        return [self.detector, self.xcu]
+
+    def createDialog(self, dialogClass):
+        ModuleRow.createDialog(self, dialogClass)
+        # detector and xcu dialogs only exist as part of the camera dialog.
+        for row in self.rows:
+            ModuleRow.createDialog(row, self.loadRowDialog)
+
+    def loadRowDialog(self, row):
+        self.controlDialog.load()
+        return row.controlDialog
+
+    def dialogLoaded(self):
+        for row in self.rows:
+            row.dialogLoaded()
+
     def setOnline(self, isOnline=None):
-        status = sum([self.detector.isOnline + self.xcu.isOnline]) if isOnline is None else int(isOnline)
-        self.actorStatus.setStatus(status)
+        # the status normally follows the online state of the detector and xcu, through the derived graph.
+        self.actorStatus.setStatus(self.status.value if isOnline is None else int(isOnline))
 
 
 class CamDialog(ControlDialog):
@@ -137,7 +169,7 @@ class CamDialog(ControlDialog):
         self.moduleRow.detector.createDialog(self.tabWidget)
 
         self.logArea = TabWidget(self)
-        self.cmdLog = CmdLogArea()
+        self.cmdLog = CmdLogArea(capacity=self.moduleRow.mwindow.logCapacity)
         self.logArea.addTab(self.cmdLog, 'cmdLog')
         self.logArea.addTab(self.xcuDialog.rawLogArea(), 'xcuLog')
         self.logArea.addTab(self.detectorDialog.rawLogArea(), 'detectorLog')
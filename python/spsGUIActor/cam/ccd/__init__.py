@@ -66,10 +66,6 @@ class CcdRow(ModuleRow):
     def widgets(self):
         return [self.substate]
 
-    def setOnline(self):
-        ModuleRow.setOnline(self)
-        self.camRow.setOnline()
-
     def createDialog(self, tabWidget):
         self.controlDialog = CcdDialog(self, tabWidget)
 
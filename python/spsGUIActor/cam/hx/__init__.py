@@ -29,10 +29,6 @@ class HxRow(ModuleRow):
     def widgets(self):
         return [self.substate]
 
-    def setOnline(self):
-        ModuleRow.setOnline(self)
-        self.camRow.setOnline()
-
     def createDialog(self, tabWidget):
         self.controlDialog = HxDialog(self, tabWidget)
 
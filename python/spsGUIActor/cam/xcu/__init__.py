@@ -13,9 +13,17 @@ from spsGUIActor.cam.xcu.pcm import PcmPanel
 from spsGUIActor.cam.xcu.temps import TempsPanel
 from spsGUIActor.cam.xcu.turbo import TurboPanel
 from spsGUIActor.common import ComboBox, GridLayout
+from spsGUIActor.history import toFloat
 from spsGUIActor.control import ControlDialog, MultiplePanel, Topbar
 from spsGUIActor.modulerow import ModuleRow
-from spsGUIActor.widgets import Controllers, ValueMRow, CmdButton, CustomedCmd, ValueGB, SwitchMRow, SwitchGB
+from spsGUIActor.trend import TrendPanel, registerTrends
+from spsGUIActor.widgets import Controllers, ValueMRow, CmdButton, CustomedCmd, ValueGB
+
+vacuumTrends = [('pressure', 0, 'Gauge'), ('ionpump1', 4, 'Ionpump1'), ('ionpump2', 4, 'Ionpump2')]
+
+
+def coolingTrends(arm):
+    return [('temps', i, name) for i, name in enumerate(TempsPanel.probeNames[arm]) if 'Channel' not in name or addEng]
 
 
 class SetButton(CmdButton):
@@ -46,70 +54,58 @@ class SetCryoMode(CustomedCmd):
         return cmdStr
 
 
-class DetectorTemp(ValueMRow):
-    def __init__(self, moduleRow):
-        ValueMRow.__init__(self, moduleRow, 'temps', 'Temperature(K)', 10, '{:g}', controllerName='temps')
+def detectorTemp(*temps):
+    # readings of 400K and above are flagged invalid by the controller.
+    temps = [toFloat(temp) for temp in temps]
+    temps = [temp for temp in temps if temp is not None and not np.isnan(temp) and temp < 400]
+
+    return np.mean(temps) if temps else None
+
 
-    def updateVals(self, ind, fmt, keyvar):
-        def checkInvalid(value):
-            try:
-                value = float(value)
-                if value >= 400:
-                    raise
-            except:
-                value = np.nan
+def ionPumps(ionpump1, ionpump2):
+    try:
+        states = [int(ionpump1), int(ionpump2)]
+    except (TypeError, ValueError):
+        return 'undef'
 
-            return value
+    return 'undef' if states[0] != states[1] else 'ON' if states[0] else 'OFF'
 
-        values = keyvar.getValue(doRaise=False)
 
-        temps = np.array([checkInvalid(values[i]) for i in [10, 11]])
+def detectorTempNode(mwindow, actorName):
+    derived = mwindow.derived
+    temps = mwindow.actor.models[actorName].keyVarDict['temps']
+    return derived.derived(('detectorTemp', actorName), [derived.keyvar(temps, 10), derived.keyvar(temps, 11)],
+                           detectorTemp)
 
-        try:
-            value = np.nanmean(temps)
-            strValue = fmt.format(value)
-        except TypeError:
-            strValue = 'nan'
 
-        self.setText(strValue)
-        self.moduleRow.mwindow.heartBeat()
+def ionPumpsNode(mwindow, actorName):
+    derived = mwindow.derived
+    keyVarDict = mwindow.actor.models[actorName].keyVarDict
+    return derived.derived(('ionPumps', actorName),
+                           [derived.keyvar(keyVarDict['ionpump1'], 0), derived.keyvar(keyVarDict['ionpump2'], 0)],
+                           ionPumps)
 
 
-class SingleIonPump(SwitchGB):
-    def __init__(self, twoIonPumps, *args, **kwargs):
-        self.twoIonPumps = twoIonPumps
-        SwitchGB.__init__(self, twoIonPumps.moduleRow, *args, **kwargs)
+class DetectorTemp(ValueMRow):
+    isDerived = True
+
+    def __init__(self, moduleRow):
+        ValueMRow.__init__(self, moduleRow, 'temps', 'Temperature(K)', 10, '{:g}', controllerName='temps')
 
-    def setText(self, txt):
-        SwitchGB.setText(self, txt)
-        self.twoIonPumps.setText(txt)
+    def subscribe(self, callNow):
+        mwindow = self.moduleRow.mwindow
+        mwindow.derived.subscribe(detectorTempNode(mwindow, self.moduleRow.actorName), self, callNow=callNow)
 
 
-class TwoIonPumps(SwitchMRow):
+class TwoIonPumps(ValueMRow):
+    isDerived = True
+
     def __init__(self, moduleRow):
-        SwitchMRow.__init__(self, moduleRow, 'ionpump1', 'Ion Pumps', 0, '{:g}')
-        self.ionpump1 = SingleIonPump(self, 'ionpump1', 'state', 0, '{:g}')
-        self.ionpump2 = SingleIonPump(self, 'ionpump2', 'state', 0, '{:g}')
-
-    def setText(self, txt):
-        try:
-            ionpump1 = self.ionpump1.value.text()
-            ionpump2 = self.ionpump2.value.text()
-
-            if ionpump1 == 'nan' or ionpump2 == 'nan':
-                raise ValueError
-            sums = int(ionpump1 == 'OFF') + int(ionpump2 == 'OFF')
-            if sums == 0:
-                txt = "ON"
-            elif sums == 2:
-                txt = "OFF"
-            else:
-                raise ValueError
-        except ValueError:
-            txt = "undef"
-
-        self.value.setText(txt)
-        self.customize()
+        ValueMRow.__init__(self, moduleRow, 'ionpump1', 'Ion Pumps', 0, '{:s}')
+
+    def subscribe(self, callNow):
+        mwindow = self.moduleRow.mwindow
+        mwindow.derived.subscribe(ionPumpsNode(mwindow, self.moduleRow.actorName), self, callNow=callNow)
 
 
 class XcuRow(ModuleRow):
@@ -125,14 +121,14 @@ class XcuRow(ModuleRow):
         self.controllers = Controllers(self)
         self.actorStatus.button.setEnabled(False)
 
+        registerTrends(self, coolingTrends(camRow.arm) + vacuumTrends)
+        self.temperature.showSparkline()
+        self.pressure.showSparkline(logScale=True)
+
     @property
     def widgets(self):
         return [self.cryoMode, self.temperature, self.pressure, self.twoIonPumps]
 
-    def setOnline(self):
-        ModuleRow.setOnline(self)
-        self.camRow.setOnline()
-
     def createDialog(self, tabWidget):
         self.controlDialog = XcuDialog(self, tabWidget)
 
@@ -169,11 +165,13 @@ class XcuDialog(ControlDialog):
         vacuumPanel.addWidget(self.gaugePanel, 1, 2)
         vacuumPanel.addWidget(self.turboPanel, 2, 0, 1, 3)
         vacuumPanel.addWidget(self.ionpumpPanel, 3, 0, 1, 3)
+        vacuumPanel.addWidget(TrendPanel(xcuRow, vacuumTrends, title='Pressure(Torr)', logScale=True), 4, 0, 1, 3)
 
         for i, cooler in enumerate(self.coolerPanels):
             coolingPanel.addWidget(cooler, i, 0)
 
         coolingPanel.addWidget(self.tempsPanel, i + 1, 0)
+        coolingPanel.addWidget(TrendPanel(xcuRow, coolingTrends(xcuRow.camRow.arm), title='Temperature(K)'), i + 2, 0)
         #coolingPanel.addWidget(self.heatersPanel, i + 2, 0)
 
         self.tabWidget.addTab(self.pcmPanel, 'PCM')
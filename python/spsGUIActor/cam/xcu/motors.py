@@ -112,9 +112,9 @@ class CcdMotor(QGroupBox):
             self.grid.addWidget(widget, 0, j)
 
         self.setStyleSheet(
-            "QGroupBox {font-size: %ipt; border: 1px solid #d7d4d1;border-radius: 3px;margin-top: 1ex;} " % (
+            "CcdMotor {font-size: %ipt; border: 1px solid #d7d4d1;border-radius: 3px;margin-top: 1ex;} " % (
                 styles.smallFont) +
-            "QGroupBox::title {subcontrol-origin: margin;subcontrol-position: top center; padding: 0 3px;}")
+            "CcdMotor::title {subcontrol-origin: margin;subcontrol-position: top center; padding: 0 3px;}")
 
     @property
     def widgets(self):
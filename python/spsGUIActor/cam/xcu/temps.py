@@ -2,7 +2,7 @@ __author__ = 'alefur'
 from spsGUIActor.cam import CamDevice
 from spsGUIActor.common import LineEdit
 from spsGUIActor.control import ControllerCmd
-from spsGUIActor.widgets import ValueGB, CustomedCmd
+from spsGUIActor.widgets import CustomedCmd, ValueGrid, ValueCell
 
 from spsGUIActor.cam.xcu import addEng
 
@@ -21,11 +21,14 @@ class TempsPanel(CamDevice):
     def createWidgets(self):
         probeNames = self.probeNames[self.moduleRow.camRow.arm]
         add = ['Channel' not in name or addEng for name in probeNames]
-        self.temps = [ValueGB(self.moduleRow, 'temps', name, i, '{:.3f}') for i, name in enumerate(probeNames) if add[i]]
+        self.probes = ValueGrid(self.moduleRow)
+        self.temps = [ValueCell(self.probes, 'temps', name, i, '{:.3f}') for i, name in enumerate(probeNames) if add[i]]
 
     def setInLayout(self):
         for i, value in enumerate(self.temps):
-            self.grid.addWidget(value, i // 4, i % 4)
+            self.probes.addCell(value, i // 4, i % 4)
+
+        self.grid.addWidget(self.probes, 0, 0)
 
 
 class RawCmd(CustomedCmd):
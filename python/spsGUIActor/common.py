@@ -58,7 +58,7 @@ class PushButton(QPushButton):
     def paintEvent(self, event):
         QPushButton.paintEvent(self, event)
         if self.mPixmap is not None:
-            y = (self.height() - self.mPixmap.height()) / 2
+            y = (self.height() - self.mPixmap.height()) // 2
             painter = QPainter(self)
             painter.drawPixmap(5, y, self.mPixmap)
 
@@ -72,7 +72,7 @@ class ControlDialog(QDialog):
 
         self.logArea = TabWidget(self)
 
-        self.cmdLog = CmdLogArea()
+        self.cmdLog = CmdLogArea(capacity=self.moduleRow.mwindow.logCapacity)
         self.rawLog = self.rawLogArea()
         self.logArea.addTab(self.cmdLog, 'cmdLog')
         self.logArea.addTab(self.rawLog, 'rawLog')
@@ -90,7 +90,8 @@ class ControlDialog(QDialog):
         self.setVisible(False)
 
     def rawLogArea(self):
-        return RawLogArea(self.moduleRow.actorName)
+        mwindow = self.moduleRow.mwindow
+        return RawLogArea(mwindow.logTailer, self.moduleRow.actorName, capacity=mwindow.rawLogCapacity)
 
     @property
     def pannels(self):
@@ -125,6 +126,39 @@ class ControlDialog(QDialog):
             widget.setEnabled(a0)
 
 
+class LazyDialog(object):
+    def __init__(self, moduleRow, dialogClass):
+        self.moduleRow = moduleRow
+        self.dialogClass = dialogClass
+        self.dialog = None
+
+    @property
+    def loaded(self):
+        return self.dialog is not None
+
+    @property
+    def pannels(self):
+        return self.dialog.pannels if self.loaded else []
+
+    def load(self):
+        if not self.loaded:
+            self.dialog = self.dialogClass(self.moduleRow)
+            self.moduleRow.dialogLoaded()
+
+        return self.dialog
+
+    def setEnabled(self, a0: bool):
+        # state is applied from scratch when the dialog is eventually loaded.
+        if self.loaded:
+            self.dialog.setEnabled(a0)
+
+    def __getattr__(self, attr):
+        if self.__dict__.get('dialog') is None:
+            raise AttributeError(attr)
+
+        return getattr(self.dialog, attr)
+
+
 class ControlPanel(QWidget):
     def __init__(self, controlDialog):
         QWidget.__init__(self)
@@ -184,8 +218,8 @@ class CommandsGB(QGroupBox):
         self.setTitle('Commands')
         self.setLayout(self.grid)
         self.setStyleSheet(
-            "QGroupBox {font-size: %ipt; border: 1px solid #d7d4d1;border-radius: 3px;margin-top: 1ex;} " % (fontSize) +
-            "QGroupBox::title {subcontrol-origin: margin;subcontrol-position: top center; padding: 0 3px;}")
+            "CommandsGB {font-size: %ipt; border: 1px solid #d7d4d1;border-radius: 3px;margin-top: 1ex;} " % (fontSize) +
+            "CommandsGB::title {subcontrol-origin: margin;subcontrol-position: top center; padding: 0 3px;}")
 
     def setEnabled(self, a0: bool):
         for item in [self.grid.itemAt(i) for i in range(self.grid.count())]:
@@ -199,11 +233,19 @@ class CommandsGB(QGroupBox):
 
 class ControllerPanel(ControlPanel):
     def __init__(self, controlDialog, controllerName):
+        self.availability = None
         ControlPanel.__init__(self, controlDialog=controlDialog)
         self.controllerName = controllerName
 
     def setEnabled(self, a0):
-        a0 = self.controllerName in self.moduleRow.keyVarDict['controllers'] if a0 else False
+        a0 = self.controllerName in self.moduleRow.controllers.available if a0 else False
+        # re-enabling a whole panel recurses through its grid, skip it when nothing changed.
+        # CONNECT/DISCONNECT follow the actor being online, whatever the controller state.
+        availability = (a0, self.moduleRow.isOnline)
+        if availability == self.availability:
+            return
+
+        self.availability = availability
         ControlPanel.setEnabled(self, a0)
 
 
@@ -78,7 +78,7 @@ class DcbRow(ModuleRow):
         self.rows = [RowOne(self), RowTwo(self)]
 
         self.controllers = Controllers(self)
-        self.createDialog(DcbDialog(self))
+        self.createDialog(DcbDialog)
 
     @property
     def widgets(self):
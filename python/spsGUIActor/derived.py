@@ -0,0 +1,163 @@
+__author__ = 'alefur'
+
+import heapq
+import weakref
+
+from spsGUIActor.fanout import keyVarValues, isAlive
+
+
+def same(value1, value2):
+    # nan compares unequal to itself, it would otherwise be propagated on every update.
+    try:
+        return value1 is value2 or value1 == value2 or (value1 != value1 and value2 != value2)
+    except (TypeError, ValueError):
+        return False
+
+
+class Node(object):
+    """ Value of the graph, either set from outside (a keyvar value, an online state) or derived from other nodes. """
+    rank = 0
+
+    def __init__(self, graph, name, value=None):
+        self.graph = graph
+        self.name = name
+        self.value = value
+        self.dependants = []
+        self.subscribers = []
+        self.listeners = []
+
+    def set(self, value):
+        """ Return True if the value actually changed, in which case subscribers and dependants are notified. """
+        if same(value, self.value):
+            return False
+
+        self.value = value
+        self.notify()
+        self.graph.schedule(self.dependants)
+
+        return True
+
+    def subscribe(self, widget, callNow=False):
+        self.subscribers.append(weakref.ref(widget))
+
+        if callNow:
+            widget.setValue(self.value)
+
+    def addListener(self, callback):
+        self.listeners.append(callback)
+
+    def notify(self):
+        alive = []
+
+        for listener in self.listeners:
+            listener(self.value)
+
+        for ref in list(self.subscribers):
+            widget = ref()
+            if not isAlive(widget):
+                continue
+
+            alive.append(ref)
+            widget.setValue(self.value)
+
+        if len(alive) != len(self.subscribers):
+            self.subscribers = alive
+
+
+class Derived(Node):
+    """ func of the input values, only recomputed when one of them changed. """
+
+    def __init__(self, graph, name, inputs, func):
+        self.inputs = inputs
+        self.func = func
+        # a node is always recomputed after all of its inputs, so it never sees a half updated set of values.
+        self.rank = 1 + max(node.rank for node in inputs)
+        Node.__init__(self, graph, name, value=self.compute())
+
+        for node in inputs:
+            node.dependants.append(self)
+
+    def compute(self):
+        return self.func(*[node.value for node in self.inputs])
+
+    def recompute(self):
+        return self.set(self.compute())
+
+
+class Graph(object):
+    """ Derived values shared by the widgets, keyed by name. Keyvar values are fed through the fanout, a keyvar update
+    only recomputes the nodes depending on the indices which changed. """
+
+    def __init__(self, fanout):
+        self.fanout = fanout
+        self.nodes = dict()
+        self.indices = dict()
+        self.pending = []
+        self.queued = set()
+        self.propagating = False
+        self.nRecomputed = 0
+        self.nUnchanged = 0
+
+    @property
+    def stats(self):
+        return dict(nodes=len(self.nodes), recomputed=self.nRecomputed, unchanged=self.nUnchanged)
+
+    def keyvar(self, keyvar, ind):
+        key = (keyvar.actor, keyvar.name)
+
+        if key not in self.indices:
+            self.indices[key] = dict()
+            self.fanout.addListener(keyvar, self.newValues)
+
+        if ind not in self.indices[key]:
+            values = keyVarValues(keyvar)
+            self.indices[key][ind] = self.nodes[key + (ind,)] = Node(self, key + (ind,), value=values[ind] if ind < len(
+                values) else None)
+
+        return self.indices[key][ind]
+
+    def source(self, name, value=None):
+        if name not in self.nodes:
+            self.nodes[name] = Node(self, name, value=value)
+
+        return self.nodes[name]
+
+    def derived(self, name, inputs, func):
+        if name not in self.nodes:
+            self.nodes[name] = Derived(self, name, inputs, func)
+
+        return self.nodes[name]
+
+    def subscribe(self, node, widget, callNow=False):
+        node.subscribe(widget, callNow=callNow)
+
+    def newValues(self, keyvar, values):
+        for ind, node in self.indices[keyvar.actor, keyvar.name].items():
+            node.set(values[ind] if ind < len(values) else None)
+
+        self.propagate()
+
+    def schedule(self, nodes):
+        for node in nodes:
+            if node in self.queued:
+                continue
+
+            self.queued.add(node)
+            heapq.heappush(self.pending, (node.rank, id(node), node))
+
+    def propagate(self):
+        if self.propagating:
+            return
+
+        self.propagating = True
+
+        try:
+            while self.pending:
+                rank, __, node = heapq.heappop(self.pending)
+                self.queued.discard(node)
+                self.nRecomputed += 1
+
+                if not node.recompute():
+                    self.nUnchanged += 1
+        finally:
+            self.propagating = False
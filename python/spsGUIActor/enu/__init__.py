@@ -29,8 +29,9 @@ from spsGUIActor.enu.pdu import PduPanel
 from spsGUIActor.enu.rexm import RexmPanel
 from spsGUIActor.enu.shutters import ShuttersPanel
 from spsGUIActor.enu.slit import SlitPanel
-from spsGUIActor.enu.temps import TempsPanel
+from spsGUIActor.enu.temps import TempsPanel, tempsTrends
 from spsGUIActor.modulerow import ModuleRow
+from spsGUIActor.trend import registerTrends
 from spsGUIActor.widgets import CmdButton, ValueMRow, Controllers, CustomedCmd
 from spsGUIActor.common import ComboBox, GridLayout
 
@@ -100,8 +101,9 @@ class EnuRow(ModuleRow):
         self.bia = ValueMRow(self, 'bia', 'BIA', 0, '{:s}', controllerName='biasha')
 
         self.controllers = Controllers(self)
+        registerTrends(self, tempsTrends)
 
-        self.createDialog(EnuDialog(self))
+        self.createDialog(EnuDialog)
 
     @property
     def widgets(self):
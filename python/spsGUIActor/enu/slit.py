@@ -2,7 +2,7 @@ __author__ = 'alefur'
 
 from spsGUIActor.common import ComboBox, CheckBox, GridLayout
 from spsGUIActor.control import ControllerPanel, ControllerCmd
-from spsGUIActor.widgets import Coordinates, ValueGB, CmdButton, DoubleSpinBoxGB, CustomedCmd, AbortButton, CriticalSwitchGB
+from spsGUIActor.widgets import Coordinates, ValueGB, CmdButton, DoubleSpinBoxGB, CustomedCmd, AbortButton, SwitchGB
 from spsGUIActor.enu import EnuDeviceCmd
 
 class CoordBoxes(GridLayout):
@@ -103,7 +103,7 @@ class SlitPanel(ControllerPanel):
         self.info = ValueGB(self.moduleRow, 'hxpStatus', 'Info', 1, '{:s}')
         self.position = ValueGB(self.moduleRow, 'slitPosition', 'Position', 0, '{:s}')
 
-        self.softwareLimitsActivated = CriticalSwitchGB(self.moduleRow, 'hxpSoftwareLimits', 'SW Limits', 0, '{:g}')
+        self.softwareLimitsActivated = SwitchGB(self.moduleRow, 'hxpSoftwareLimits', 'SW Limits', 0, '{:g}')
 
         self.coordinates = Coordinates(self.moduleRow, 'slit', title='Position')
         self.work = Coordinates(self.moduleRow, 'slitWork', title='Work')
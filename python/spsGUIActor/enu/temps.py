@@ -3,7 +3,8 @@ __author__ = 'alefur'
 import spsGUIActor.styles as styles
 from PyQt5.QtWidgets import QGroupBox, QGridLayout
 from spsGUIActor.control import ControllerPanel, ControllerCmd
-from spsGUIActor.widgets import ValueGB, CmdButton
+from spsGUIActor.trend import TrendPanel
+from spsGUIActor.widgets import ValueGB, CmdButton, ValueGrid, ValueCell
 from spsGUIActor.enu import EnuDeviceCmd
 
 
@@ -27,8 +28,8 @@ class Slot(QGroupBox):
         self.setTitle(title)
         self.setLayout(self.grid)
         self.setStyleSheet(
-            "QGroupBox {font-size: %ipt; border: 1px solid #d7d4d1;border-radius: 3px;margin-top: 1ex;} " % (fontSize) +
-            "QGroupBox::title {subcontrol-origin: margin;subcontrol-position: top center; padding: 0 3px;}")
+            "Slot {font-size: %ipt; border: 1px solid #d7d4d1;border-radius: 3px;margin-top: 1ex;} " % (fontSize) +
+            "Slot::title {subcontrol-origin: margin;subcontrol-position: top center; padding: 0 3px;}")
 
     def setEnabled(self, a0: bool):
         QGroupBox.setEnabled(self, a0)
@@ -72,8 +73,10 @@ class TempsPanel(ControllerPanel):
         self.slot1 = Slot(self.moduleRow, 1)
         self.slot2 = Slot(self.moduleRow, 2)
 
-        self.temps1 = [ValueGB(self.moduleRow, 'temps1', name, i, '{:.3f}') for i, name in enumerate(self.probeNames1)]
-        self.temps2 = [ValueGB(self.moduleRow, 'temps2', name, i, '{:.3f}') for i, name in enumerate(self.probeNames2)]
+        self.probes = ValueGrid(self.moduleRow)
+        self.temps1 = [ValueCell(self.probes, 'temps1', name, i, '{:.3f}') for i, name in enumerate(self.probeNames1)]
+        self.temps2 = [ValueCell(self.probes, 'temps2', name, i, '{:.3f}') for i, name in enumerate(self.probeNames2)]
+        self.trend = TrendPanel(self.moduleRow, tempsTrends, title='Temperature(°C)')
 
     def setInLayout(self):
         self.grid.addWidget(self.mode, 0, 0)
@@ -83,7 +86,15 @@ class TempsPanel(ControllerPanel):
         #self.grid.addWidget(self.slot1, 1, 0, 1, 4)
         #self.grid.addWidget(self.slot2, 2, 0, 1, 4)
         for i, value in enumerate(self.temps1 + self.temps2):
-            self.grid.addWidget(value, 1 + i % 5, i // 5)
+            self.probes.addCell(value, i % 5, i // 5)
+
+        self.grid.addWidget(self.probes, 1, 0, 5, 4)
+
+        self.grid.addWidget(self.trend, 6, 0, 1, 4)
+
+
+tempsTrends = [('temps1', i, name) for i, name in enumerate(TempsPanel.probeNames1)] + \
+              [('temps2', i, name) for i, name in enumerate(TempsPanel.probeNames2)]
 
 
 class TempsCommands(EnuDeviceCmd):
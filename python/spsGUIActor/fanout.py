@@ -0,0 +1,75 @@
+__author__ = 'alefur'
+
+import weakref
+
+from PyQt5 import sip
+
+
+def isAlive(widget):
+    # subscribers are widgets, or plain objects (eg ValueCell) which simply live as long as they are referenced.
+    return widget is not None and not (isinstance(widget, sip.simplewrapper) and sip.isdeleted(widget))
+
+
+def keyVarValues(keyvar):
+    values = keyvar.getValue(doRaise=False)
+    return (values,) if not isinstance(values, tuple) else values
+
+
+class KeyFanout(object):
+    def __init__(self, keyvar, heartBeat=None):
+        self.keyvar = keyvar
+        self.heartBeat = heartBeat
+        self.subscribers = []
+        self.listeners = []
+        keyvar.addCallback(self.dispatch, callNow=False)
+
+    def subscribe(self, widget, callNow=False):
+        # weak references, a destroyed widget just drops out on the next dispatch.
+        self.subscribers.append(weakref.ref(widget))
+
+        if callNow:
+            widget.updateVals(keyVarValues(self.keyvar))
+
+    def addListener(self, callback):
+        self.listeners.append(callback)
+
+    def dispatch(self, keyvar):
+        values = keyVarValues(keyvar)
+        alive = []
+
+        if self.heartBeat is not None:
+            self.heartBeat()
+
+        for listener in self.listeners:
+            listener(keyvar, values)
+
+        for ref in list(self.subscribers):
+            widget = ref()
+            if not isAlive(widget):
+                continue
+
+            alive.append(ref)
+            widget.updateVals(values)
+
+        if len(alive) != len(self.subscribers):
+            self.subscribers = alive
+
+
+class Fanout(object):
+    def __init__(self, heartBeat=None):
+        self.heartBeat = heartBeat
+        self.keys = dict()
+
+    def get(self, keyvar):
+        key = (keyvar.actor, keyvar.name)
+
+        if key not in self.keys:
+            self.keys[key] = KeyFanout(keyvar, heartBeat=self.heartBeat)
+
+        return self.keys[key]
+
+    def subscribe(self, keyvar, widget, callNow=False):
+        self.get(keyvar).subscribe(widget, callNow=callNow)
+
+    def addListener(self, keyvar, callback):
+        self.get(keyvar).addListener(callback)
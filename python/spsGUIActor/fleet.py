@@ -0,0 +1,245 @@
+__author__ = 'alefur'
+
+import spsGUIActor.styles as styles
+import spsGUIActor.theme as theme
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PyQt5.QtGui import QColor
+from PyQt5.QtWidgets import QTableView, QStyledItemDelegate, QHeaderView, QAbstractItemView, QAbstractScrollArea
+from spsGUIActor.cam import CamRow, camStatusNode
+from spsGUIActor.cam.xcu import detectorTempNode, ionPumpsNode
+from spsGUIActor.enu import EnuRow
+
+ColorsRole = Qt.UserRole
+
+
+def upper(value):
+    return str(value).upper()
+
+
+class Cell(object):
+    """ One value of the fleet table, rendered through the frame scheduler like a ValueGB. """
+    coalesce = True
+    lastRendered = None
+
+    def __init__(self, model, row, column, node, fmt='{}', convert=None, online=None):
+        self.model = model
+        self.row = row
+        self.column = column
+        self.fmt = fmt
+        self.convert = convert
+        self.online = online
+        self.text = ''
+
+        node.addListener(self.setValue)
+        if online is not None:
+            online.addListener(self.setOnline)
+
+        if node.value is not None:
+            self.setValue(node.value)
+
+    @property
+    def isOnline(self):
+        return self.online is None or bool(self.online.value)
+
+    @property
+    def colors(self):
+        if not self.isOnline:
+            return styles.colorWidget('offline')
+
+        try:
+            return styles.colorWidget(self.text)
+        except KeyError:
+            return styles.colorWidget('default')
+
+    def setValue(self, value):
+        try:
+            strValue = self.fmt.format(value if value is None or self.convert is None else self.convert(value))
+        except (TypeError, ValueError):
+            strValue = 'nan'
+
+        self.model.frameScheduler.push(self, strValue)
+
+    def setOnline(self, isOnline):
+        self.lastRendered = None
+        self.model.cellChanged(self)
+
+    def renderKey(self, strValue):
+        return strValue, self.isOnline
+
+    def isVisible(self):
+        # the table is part of the main window, it is always shown.
+        return True
+
+    def refresh(self, strValue):
+        self.text = strValue
+        self.lastRendered = self.renderKey(strValue)
+        self.model.cellChanged(self)
+
+
+class FleetModule(object):
+    """ Stands for a Specmodule, its rows are only built once their dialog is requested. """
+
+    def __init__(self, mwindow, smId):
+        self.mwindow = mwindow
+        self.smId = smId
+
+
+class FleetRow(object):
+    def __init__(self, label, createRow):
+        self.label = label
+        self.createRow = createRow
+        self.moduleRow = None
+        self.cells = dict()
+
+    def showDetails(self):
+        if self.moduleRow is None:
+            self.moduleRow = self.createRow()
+
+        self.moduleRow.showDetails()
+
+
+class FleetModel(QAbstractTableModel):
+    """ One row per camera and entrance unit of every spectrograph module, cells are fed by the derived graph and
+    only the ones whose text or online state changed are signalled to the view. """
+    columns = ['Actor', 'Mode', 'Exposure', 'Temperature(K)', 'Pressure(Torr)', 'Ion Pumps', 'Red Resolution', 'Slit',
+               'Shutters', 'BIA']
+
+    def __init__(self, mwindow):
+        QAbstractTableModel.__init__(self)
+        self.mwindow = mwindow
+        self.frameScheduler = mwindow.frameScheduler
+        self.rows = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(FleetModel.columns)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+
+        return FleetModel.columns[section] if orientation == Qt.Horizontal else self.rows[section].label
+
+    def data(self, index, role=Qt.DisplayRole):
+        cell = self.rows[index.row()].cells.get(index.column())
+        if cell is None:
+            return None
+
+        if role == Qt.DisplayRole:
+            return cell.text
+        if role == ColorsRole:
+            return cell.colors
+
+    def cellChanged(self, cell):
+        index = self.index(cell.row, cell.column)
+        self.dataChanged.emit(index, index, [Qt.DisplayRole])
+
+    def addRow(self, fleetRow, cells):
+        row = len(self.rows)
+
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.rows.append(fleetRow)
+
+        for column, node, kwargs in cells:
+            column = FleetModel.columns.index(column)
+            fleetRow.cells[column] = Cell(self, row, column, node, **kwargs)
+
+        self.endInsertRows()
+
+    def addSpecModule(self, smId, enu=True, arms=None):
+        arms = ['b', 'r', 'n'] if arms is None else arms
+        module = FleetModule(self.mwindow, smId)
+
+        if enu:
+            self.addEnu(module)
+
+        for arm in arms:
+            self.addCam(module, arm)
+
+    def keyvar(self, actorName, key, ind):
+        return self.mwindow.derived.keyvar(self.mwindow.actor.models[actorName].keyVarDict[key], ind)
+
+    def addEnu(self, module):
+        actorName = 'enu_sm%d' % module.smId
+        online = self.mwindow.onlineState.node(actorName)
+
+        cells = [('Actor', online, dict(convert=lambda isOnline: 'ONLINE' if isOnline else 'OFFLINE')),
+                 ('Mode', self.keyvar(actorName, 'metaFSM', 0), dict(convert=upper, online=online)),
+                 ('Exposure', self.keyvar(actorName, 'metaFSM', 1), dict(convert=upper, online=online)),
+                 ('Red Resolution', self.keyvar(actorName, 'rexm', 0), dict(online=online)),
+                 ('Slit', self.keyvar(actorName, 'slitPosition', 0), dict(online=online)),
+                 ('Shutters', self.keyvar(actorName, 'shutters', 0), dict(online=online)),
+                 ('BIA', self.keyvar(actorName, 'bia', 0), dict(online=online))]
+
+        self.addRow(FleetRow('ENU SM%d' % module.smId, lambda: EnuRow(module)), cells)
+
+    def addCam(self, module, arm):
+        xcuName = 'xcu_%s%d' % (arm, module.smId)
+        detectorName = '%s_%s%d' % ('ccd' if arm in ['b', 'r'] else 'hx', arm, module.smId)
+        xcuOnline, detectorOnline = self.mwindow.onlineState.node(xcuName), self.mwindow.onlineState.node(detectorName)
+        status = camStatusNode(self.mwindow, xcuName, detectorName)
+
+        cells = [('Actor', status, dict(convert=lambda status: ['OFFLINE', 'MIDSTATE', 'ONLINE'][status])),
+                 ('Mode', self.keyvar(xcuName, 'cryoMode', 0), dict(online=xcuOnline)),
+                 ('Exposure', self.keyvar(detectorName, 'exposureState', 0), dict(convert=upper, online=detectorOnline)),
+                 ('Temperature(K)', detectorTempNode(self.mwindow, xcuName), dict(fmt='{:g}', online=xcuOnline)),
+                 ('Pressure(Torr)', self.keyvar(xcuName, 'pressure', 0), dict(fmt='{:g}', online=xcuOnline)),
+                 ('Ion Pumps', ionPumpsNode(self.mwindow, xcuName), dict(online=xcuOnline))]
+
+        self.addRow(FleetRow('%sCU SM%d' % (arm.upper(), module.smId), lambda: CamRow(module, arm)), cells)
+
+    def showDetails(self, index):
+        self.rows[index.row()].showDetails()
+
+
+class CellDelegate(QStyledItemDelegate):
+    """ Cells are a gradient and a centered text, painted directly rather than through the style. """
+
+    def __init__(self):
+        QStyledItemDelegate.__init__(self)
+        self.colors = dict()
+
+    def color(self, police):
+        if police not in self.colors:
+            self.colors[police] = QColor(police)
+
+        return self.colors[police]
+
+    def paint(self, painter, option, index):
+        colors = index.data(ColorsRole)
+        if colors is None:
+            return
+
+        background, police = colors
+        rect = option.rect.adjusted(1, 1, -1, -1)
+        painter.fillRect(rect, theme.brush(background))
+        painter.setPen(self.color(police))
+        painter.drawText(rect, Qt.AlignCenter, index.data(Qt.DisplayRole))
+
+
+class FleetView(QTableView):
+    rowHeight = 24
+
+    def __init__(self, mwindow):
+        QTableView.__init__(self)
+        self.fleetModel = FleetModel(mwindow)
+        self.setModel(self.fleetModel)
+        self.setItemDelegate(CellDelegate())
+
+        self.setFont(theme.font(styles.bigFont))
+        self.setShowGrid(False)
+        self.setSelectionMode(QAbstractItemView.NoSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setSizeAdjustPolicy(QAbstractScrollArea.AdjustToContents)
+
+        # fixed sizes, so that a cell update never triggers a layout of the whole table.
+        self.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.verticalHeader().setDefaultSectionSize(FleetView.rowHeight)
+
+        self.clicked.connect(self.fleetModel.showDetails)
+
+    def addSpecModule(self, smId, enu=True, arms=None):
+        self.fleetModel.addSpecModule(smId, enu=enu, arms=arms)
@@ -0,0 +1,314 @@
+__author__ = 'alefur'
+
+import fcntl
+import os
+import shutil
+import time
+
+import numpy as np
+
+sampleType = np.dtype([('timestamp', '<f8'), ('value', '<f8')])
+# spilled series are one file per night, a fixed size header followed by the ring samples.
+headerType = np.dtype([('magic', 'S8'), ('capacity', '<u8'), ('count', '<u8')])
+magic = b'SPSHIST1'
+nightRollover = 12 * 3600
+
+
+def nightOf(timestamp):
+    # nights run from noon to noon, local time.
+    return time.strftime('%Y-%m-%d', time.localtime(timestamp - nightRollover))
+
+
+def nightStart(night):
+    return time.mktime(time.strptime(night, '%Y-%m-%d')) + nightRollover
+
+
+def nightEnd(night):
+    return nightStart(time.strftime('%Y-%m-%d', time.localtime(nightStart(night) + 24 * 3600)))
+
+
+def spillDir(config):
+    datadir = os.path.expandvars(config.get('spsgui', 'datadir', fallback=''))
+
+    if not config.getboolean('spsgui', 'spillHistory', fallback=True) or not datadir or '$' in datadir:
+        return None
+
+    return os.path.join(datadir, 'history')
+
+
+def toFloat(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class RingBuffer(object):
+    """ Fixed number of (timestamp, value) samples, the oldest one being overwritten once full. """
+
+    def __init__(self, capacity, samples=None, count=0):
+        self.capacity = capacity
+        self.samples = np.full(capacity, np.nan, dtype=sampleType) if samples is None else samples
+        self.count = count
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    @property
+    def last(self):
+        return self.samples[(self.count - 1) % self.capacity] if self.count else None
+
+    def append(self, timestamp, value):
+        self.samples[self.count % self.capacity] = (timestamp, value)
+        self.count += 1
+
+    def ordered(self):
+        if self.count <= self.capacity:
+            return [self.samples[:self.count]]
+
+        head = self.count % self.capacity
+        return [self.samples[head:], self.samples[:head]]
+
+    def window(self, start=None, end=None):
+        # samples are appended in time order, each chunk is searched independently and only copied if both are hit.
+        chunks = []
+
+        for chunk in self.ordered():
+            timestamps = chunk['timestamp']
+            i0 = 0 if start is None else np.searchsorted(timestamps, start, side='left')
+            i1 = len(chunk) if end is None else np.searchsorted(timestamps, end, side='right')
+            if i1 > i0:
+                chunks.append(chunk[i0:i1])
+
+        samples = chunks[0] if len(chunks) == 1 else np.concatenate(chunks) if chunks else self.samples[:0]
+        return samples['timestamp'], samples['value']
+
+
+class MappedRing(RingBuffer):
+    """ Ring buffer living in a file, the sample count is kept in the header so it can be mapped back as is. """
+
+    def __init__(self, path, capacity=None, readOnly=False):
+        if capacity is not None and not os.path.isfile(path):
+            size = headerType.itemsize + capacity * sampleType.itemsize
+            fileMap = np.memmap(path, dtype=np.uint8, mode='w+', shape=size)
+            header = fileMap[:headerType.itemsize].view(headerType)
+            header['magic'] = magic
+            header['capacity'] = capacity
+            fileMap[headerType.itemsize:].view(sampleType)['timestamp'] = np.nan
+            fileMap.flush()
+            del fileMap
+
+        self.path = path
+        self.map = np.memmap(path, dtype=np.uint8, mode='r' if readOnly else 'r+')
+        self.header = self.map[:headerType.itemsize].view(headerType)
+
+        if self.header['magic'][0] != magic:
+            raise ValueError('%s is not a history file' % path)
+
+        capacity = int(self.header['capacity'][0])
+        samples = self.map[headerType.itemsize:headerType.itemsize + capacity * sampleType.itemsize].view(sampleType)
+        RingBuffer.__init__(self, capacity, samples=samples, count=int(self.header['count'][0]))
+
+    def append(self, timestamp, value):
+        RingBuffer.append(self, timestamp, value)
+        self.header['count'] = self.count
+
+
+class History(object):
+    """ Every numerical value displayed by a ValueGB, per (actor, keyword, index).
+
+    With a spill directory, series are mapped from <directory>/<night>/<actor>.<keyword>.<index>, so that the current
+    night is available again right after a restart, and previous nights are mapped read-only when a window reaches
+    them. Whole nights are evicted, oldest first, to keep the directory under maxSize MB. The night being written is
+    locked, a second gui on the same host keeps its own history in memory instead.
+    """
+    capacity = 17280
+    maxSize = 2048
+
+    def __init__(self, fanout, capacity=None, directory=None, maxSize=None):
+        self.fanout = fanout
+        self.capacity = History.capacity if capacity is None else capacity
+        self.directory = directory
+        self.maxSize = History.maxSize if maxSize is None else maxSize
+        self.indices = dict()
+        self.series = dict()
+        self.archive = dict()
+        self.night = None
+        self.nightEnd = None
+        self.pastNights = []
+        self.lockFile = None
+        self.spilled = False
+
+        if self.directory is not None:
+            self.load(nightOf(time.time()))
+            self.evict()
+
+    @property
+    def stats(self):
+        return dict(series=len(self.series), samples=sum(len(series) for series in self.series.values()),
+                    nbytes=sum(series.samples.nbytes for series in self.series.values()),
+                    archived=len([ring for ring in self.archive.values() if ring is not None]))
+
+    def nightDir(self, night):
+        return os.path.join(self.directory, night)
+
+    def nights(self):
+        return [night for night, start, end in self.pastNights]
+
+    def scanNights(self):
+        # windows are queried on every sparkline and trend refresh, the directory is only listed on rollover.
+        try:
+            nights = sorted(night for night in os.listdir(self.directory) if os.path.isdir(self.nightDir(night)))
+        except OSError:
+            nights = []
+
+        self.pastNights = []
+
+        for night in [night for night in nights if night < self.night]:
+            try:
+                self.pastNights.append((night, nightStart(night), nightEnd(night)))
+            except ValueError:
+                continue
+
+    def lock(self, night):
+        if self.lockFile is not None:
+            self.lockFile.close()
+            self.lockFile = None
+
+        try:
+            os.makedirs(self.nightDir(night), exist_ok=True)
+            lockFile = open(os.path.join(self.nightDir(night), '.lock'), 'w')
+        except OSError:
+            return False
+
+        try:
+            fcntl.flock(lockFile, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lockFile.close()
+            return False
+
+        self.lockFile = lockFile
+        return True
+
+    def load(self, night):
+        self.night = night
+        self.nightEnd = nightEnd(night)
+        # the mapped files of a night are written in place, by a single gui.
+        self.spilled = self.lock(night)
+
+        if not self.spilled:
+            return
+
+        try:
+            filenames = os.listdir(self.nightDir(night))
+        except OSError:
+            return
+
+        for filename in filenames:
+            try:
+                actor, key, ind = filename.rsplit('.', 2)
+                self.series[actor, key, int(ind)] = MappedRing(os.path.join(self.nightDir(night), filename))
+            except ValueError:
+                continue
+
+    def rollover(self, timestamp):
+        for seriesKey, series in self.series.items():
+            self.archive[self.night, seriesKey] = series
+
+        self.series = dict()
+        self.load(nightOf(timestamp))
+        self.evict()
+
+    def evict(self):
+        self.scanNights()
+        nights = self.nights()
+        sizes = dict()
+
+        for night in nights + [self.night]:
+            directory = self.nightDir(night)
+            sizes[night] = sum(os.path.getsize(os.path.join(directory, filename)) for filename in
+                               os.listdir(directory)) if os.path.isdir(directory) else 0
+
+        while nights and sum(sizes.values()) > self.maxSize * 1e6:
+            night = nights.pop(0)
+            shutil.rmtree(self.nightDir(night), ignore_errors=True)
+            sizes.pop(night)
+            self.pastNights.pop(0)
+
+            for archiveKey in [archiveKey for archiveKey in self.archive if archiveKey[0] == night]:
+                self.archive.pop(archiveKey)
+
+    def register(self, keyvar, ind):
+        key = (keyvar.actor, keyvar.name)
+
+        if key not in self.indices:
+            self.indices[key] = set()
+            self.fanout.addListener(keyvar, self.newValues)
+
+        self.indices[key].add(ind)
+
+    def newValues(self, keyvar, values):
+        timestamp = time.time()
+
+        for ind in self.indices[keyvar.actor, keyvar.name]:
+            value = toFloat(values[ind]) if ind < len(values) else None
+            if value is None:
+                continue
+
+            self.append((keyvar.actor, keyvar.name, ind), timestamp, value)
+
+    def append(self, seriesKey, timestamp, value):
+        if self.nightEnd is not None and timestamp >= self.nightEnd:
+            self.rollover(timestamp)
+
+        # buffers are only allocated for series which turn out to be numerical.
+        if seriesKey not in self.series:
+            self.series[seriesKey] = self.createSeries(seriesKey)
+
+        self.series[seriesKey].append(timestamp, value)
+
+    def createSeries(self, seriesKey):
+        if not self.spilled:
+            return RingBuffer(self.capacity)
+
+        os.makedirs(self.nightDir(self.night), exist_ok=True)
+        return MappedRing(os.path.join(self.nightDir(self.night), '%s.%s.%d' % seriesKey), capacity=self.capacity)
+
+    def archived(self, seriesKey, night):
+        archiveKey = (night, seriesKey)
+
+        if archiveKey not in self.archive:
+            try:
+                self.archive[archiveKey] = MappedRing(os.path.join(self.nightDir(night), '%s.%s.%d' % seriesKey),
+                                                      readOnly=True)
+            except (OSError, ValueError):
+                self.archive[archiveKey] = None
+
+        return self.archive[archiveKey]
+
+    def segments(self, seriesKey, start=None, end=None):
+        segments = []
+
+        if self.directory is not None:
+            for night, nightFrom, nightTo in self.pastNights:
+                if (start is not None and nightTo < start) or (end is not None and nightFrom > end):
+                    continue
+
+                segments.append(self.archived(seriesKey, night))
+
+        segments.append(self.series.get(seriesKey))
+        return [series for series in segments if series is not None]
+
+    def get(self, actor, key, ind):
+        return self.series.get((actor, key, ind))
+
+    def window(self, actor, key, ind, start=None, end=None):
+        windows = [series.window(start=start, end=end) for series in self.segments((actor, key, ind), start, end)]
+
+        if not windows:
+            return np.empty(0), np.empty(0)
+        if len(windows) == 1:
+            return windows[0]
+
+        return np.concatenate([timestamps for timestamps, values in windows]), \
+               np.concatenate([values for timestamps, values in windows])
@@ -0,0 +1,42 @@
+__author__ = 'alefur'
+
+import re
+
+
+def aitActors(config):
+    return [actor.strip() for actor in config.get('ait', 'actors').split(',') if actor.strip()]
+
+
+def specModules(config):
+    specModules = []
+
+    for section in config.sections():
+        match = re.match(r'^sm(\d+)$', section)
+        if match is None:
+            continue
+
+        arms = [arm.strip() for arm in config.get(section, 'arms').split(',') if arm.strip()]
+        enu = config.getboolean(section, 'enu')
+        specModules.append((int(match.group(1)), enu, arms))
+
+    return sorted(specModules)
+
+
+def specModuleModels(smId, enu, arms):
+    models = ['sps', 'enu_sm%d' % smId] if enu else []
+
+    for arm in arms:
+        cam = '%s%d' % (arm, smId)
+        detector = 'ccd' if arm in ['b', 'r'] else 'hx'
+        models += ['xcu_%s' % cam, '%s_%s' % (detector, cam)]
+
+    return models
+
+
+def modelNames(config):
+    models = ['hub'] + aitActors(config)
+
+    for smId, enu, arms in specModules(config):
+        models += specModuleModels(smId, enu, arms)
+
+    return list(dict.fromkeys(models))
@@ -1,15 +1,169 @@
 __author__ = 'alefur'
 import os
-import subprocess
+from collections import deque, namedtuple
 from datetime import datetime as dt
 
 import spsGUIActor.styles as styles
-from PyQt5.QtCore import QTimer
-from PyQt5.QtGui import QFont, QTextCursor
-from PyQt5.QtWidgets import QPlainTextEdit
+from PyQt5.QtCore import Qt, QTimer, QObject, QFileSystemWatcher, QAbstractListModel, QModelIndex, QSize
+from PyQt5.QtGui import QFont, QColor, QKeySequence
+from PyQt5.QtWidgets import QListView, QStyledItemDelegate, QAbstractItemView, QApplication, QStyle
 
+LogRecord = namedtuple('LogRecord', ['timestamp', 'actor', 'code', 'text'])
 
-class CmdLogArea(QPlainTextEdit):
+
+class LogModel(QAbstractListModel):
+    frameInterval = 50
+
+    def __init__(self, capacity):
+        QAbstractListModel.__init__(self)
+        self.capacity = capacity
+        self.records = deque()
+        self.pending = []
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(LogModel.frameInterval)
+        self.timer.timeout.connect(self.flush)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.records)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        record = self.records[index.row()]
+
+        if role in [Qt.DisplayRole, Qt.ToolTipRole]:
+            return self.format(record)
+        if role == Qt.UserRole:
+            return record
+
+        return None
+
+    def format(self, record):
+        text = record.text if record.actor is None else '%s %s %s' % (record.actor, record.code, record.text)
+        if record.timestamp is None:
+            return text
+
+        return '%s  %s' % (record.timestamp.strftime('%Y-%m-%d %H:%M:%S'), text)
+
+    def append(self, record):
+        self.pending.append(record)
+
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def extend(self, records):
+        self.pending.extend(records)
+
+        if self.pending and not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self):
+        # only the last capacity records of the batch can survive.
+        pending, self.pending = self.pending[-self.capacity:], []
+        overflow = len(self.records) + len(pending) - self.capacity
+
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            for i in range(overflow):
+                self.records.popleft()
+            self.endRemoveRows()
+
+        if not pending:
+            return
+
+        first = len(self.records)
+        self.beginInsertRows(QModelIndex(), first, first + len(pending) - 1)
+        self.records.extend(pending)
+        self.endInsertRows()
+
+
+class LogDelegate(QStyledItemDelegate):
+    colors = dict()
+
+    def __init__(self, parent):
+        QStyledItemDelegate.__init__(self, parent)
+        self.fontMetrics = parent.fontMetrics()
+        self.lineHeight = self.fontMetrics.height()
+        self.lineWidth = 0
+
+    def color(self, code):
+        if code not in LogDelegate.colors:
+            color, __ = styles.colorWidget(CmdLogArea.colorCode.get(code, 'regular'))
+            LogDelegate.colors[code] = QColor(color)
+
+        return LogDelegate.colors[code]
+
+    def paint(self, painter, option, index):
+        record = index.data(Qt.UserRole)
+
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+
+        painter.save()
+        painter.setFont(option.font)
+        painter.setPen(self.color(record.code))
+        painter.drawText(option.rect, Qt.AlignLeft | Qt.AlignVCenter, index.data(Qt.DisplayRole))
+        painter.restore()
+
+    def fit(self, texts):
+        """ Widen the items to the longest line so far, return True if it changed. """
+        lineWidth = max([self.lineWidth] + [self.fontMetrics.horizontalAdvance(text) for text in texts])
+        changed, self.lineWidth = lineWidth != self.lineWidth, lineWidth
+
+        return changed
+
+    def sizeHint(self, option, index):
+        # items are uniform, the widest line sets the width of all of them so that the view scrolls horizontally.
+        return QSize(self.lineWidth, self.lineHeight)
+
+
+class LogView(QListView):
+    capacity = 10000
+
+    def __init__(self, capacity=None):
+        QListView.__init__(self)
+        capacity = self.capacity if capacity is None else capacity
+        self.setStyleSheet("QListView {background-color: black;}")
+        self.setFont(QFont("Monospace", styles.smallFont))
+        self.setUniformItemSizes(True)
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+
+        self.logModel = LogModel(capacity=capacity)
+        self.setModel(self.logModel)
+        self.setHorizontalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.logDelegate = LogDelegate(self)
+        self.setItemDelegate(self.logDelegate)
+
+        self.followTail = True
+        self.logModel.rowsAboutToBeInserted.connect(self.aboutToInsert)
+        self.logModel.rowsInserted.connect(self.inserted)
+
+    def aboutToInsert(self):
+        scrollBar = self.verticalScrollBar()
+        self.followTail = scrollBar.value() == scrollBar.maximum()
+
+    def inserted(self, parent, first, last):
+        texts = [self.logModel.data(self.logModel.index(row)) for row in range(first, last + 1)]
+        if self.logDelegate.fit(texts):
+            self.scheduleDelayedItemsLayout()
+
+        if self.followTail:
+            self.scrollToBottom()
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.Copy):
+            rows = sorted(index.row() for index in self.selectedIndexes())
+            QApplication.clipboard().setText('\n'.join(self.logModel.data(self.logModel.index(row)) for row in rows))
+            return
+
+        QListView.keyPressEvent(self, event)
+
+
+class CmdLogArea(LogView):
     printLevels = {'D': 0, '>': 0,
                    'I': 1, ':': 1,
                    'W': 2,
@@ -22,96 +176,270 @@ class CmdLogArea(QPlainTextEdit):
                  'f': 'failed',
                  '!': 'failed'}
 
-    def __init__(self):
-        QPlainTextEdit.__init__(self)
+    def __init__(self, capacity=None):
+        LogView.__init__(self, capacity=capacity)
         self.setMinimumSize(720, 180)
         self.printLevel = CmdLogArea.printLevels['I']
-        self.setMaximumBlockCount(10000)
-        self.setReadOnly(True)
 
-        self.setStyleSheet("background-color: black;color:white;")
-        self.setFont(QFont("Monospace", styles.smallFont))
-
-    def newLine(self, newLine, code=None):
+    def newLine(self, newLine, code=None, actor=None):
         code = 'i' if code is None else code
-        color, __ = styles.colorWidget(CmdLogArea.colorCode[code])
-        self.appendHtml('\n<font color="%s">%s  %s</font>' % (color, dt.now().strftime('%Y-%m-%d %H:%M:%S'), newLine))
-
-        self.moveCursor(QTextCursor.End)
-        self.ensureCursorVisible()
-
-    def formatResponse(self, actor, code, keywords):
-        color, __ = styles.colorWidget(CmdLogArea.colorCode[code])
-        return '<font color="%s">%s %s %s</font>' % (color, actor, code, keywords)
+        self.logModel.append(LogRecord(timestamp=dt.now(), actor=actor, code=code, text=newLine))
 
     def printResponse(self, resp):
         reply = resp.replyList[-1]
         code = resp.lastCode
 
         if CmdLogArea.printLevels[code] >= self.printLevel:
-            self.newLine(newLine='%s %s %s ' % (reply.header.actor,
-                                                reply.header.code.lower(),
-                                                reply.keywords.canonical(delimiter=';')),
-                         code=reply.header.code.lower())
+            self.newLine(newLine=reply.keywords.canonical(delimiter=';'),
+                         code=reply.header.code.lower(),
+                         actor=reply.header.actor)
+
+
+class TailedFile(object):
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.partial = b''
+        self.callbacks = []
 
+    @property
+    def offset(self):
+        return 0 if self.file is None else self.file.tell()
 
-class RawLogArea(QPlainTextEdit):
-    colorCode = {'i': 'regular', 'w': 'warning', 'f': 'failed', ':': 'success'}
-    refresh = 60
-    maxBlockCount = 20000
-    maxBytes = 100000
+    @property
+    def position(self):
+        if self.file is None:
+            return None
+
+        return os.fstat(self.file.fileno()).st_ino, self.file.tell() - len(self.partial)
+
+    def open(self, fromEnd=False, blockSize=4096):
+        self.close()
+        try:
+            self.file = open(self.path, 'rb')
+        except OSError:
+            return False
 
-    def __init__(self, actor):
-        QPlainTextEdit.__init__(self)
+        if fromEnd:
+            # keep the unterminated last line as partial, so it is emitted whole once completed.
+            size = self.file.seek(0, os.SEEK_END)
+            self.file.seek(max(0, size - blockSize))
+            block = self.file.read()
+            self.partial = block[block.rfind(b'\n') + 1:] if b'\n' in block else b''
+
+        return True
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+        self.file = None
+
+    def rotated(self):
+        try:
+            current = os.stat(self.path)
+        except OSError:
+            return False
+
+        opened = os.fstat(self.file.fileno())
+        return current.st_ino != opened.st_ino or current.st_size < self.file.tell()
+
+    def readLines(self):
+        if self.file is None and not self.open():
+            return []
+
+        # drain whatever was appended to the file we hold, then follow current.log if it was rotated.
+        data = self.file.read()
+        if self.rotated():
+            # partial is not reset by open, a line left unterminated is completed by the start of the new file.
+            self.open()
+            data += self.file.read() if self.file is not None else b''
+
+        lines = (self.partial + data).split(b'\n')
+        self.partial = lines.pop()
+
+        return [line.decode('utf8', errors='replace') for line in lines]
+
+    def backfill(self, nbline, since=None, blockSize=65536):
+        if self.file is None:
+            return []
+
+        end = self.file.tell() - len(self.partial)
+        data = b''
+
+        with open(self.path, 'rb') as file:
+            # do not go further back than a previously consumed position of that same file.
+            inode, floor = (None, 0) if since is None else since
+            floor = floor if inode == os.fstat(file.fileno()).st_ino else 0
+            end = min(end, file.seek(0, os.SEEK_END))
+            start = end
+
+            while start > floor and data.count(b'\n') <= nbline:
+                start = max(floor, start - blockSize)
+                file.seek(start)
+                data = file.read(end - start)
+
+        lines = data.split(b'\n')[:-1]
+        lines = lines if start == floor else lines[1:]
+
+        return [line.decode('utf8', errors='replace') for line in lines[-nbline:]]
+
+
+class LogTailer(QObject):
+    pollInterval = 10
+
+    def __init__(self, pollInterval=None):
+        QObject.__init__(self)
+        pollInterval = LogTailer.pollInterval if pollInterval is None else pollInterval
+        self.files = dict()
+
+        # inotify backed on linux, the timer covers missed events and filesystems without notifications.
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.fileChanged)
+        self.watcher.directoryChanged.connect(self.directoryChanged)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.poll)
+        self.timer.setInterval(int(pollInterval * 1000))
+
+    def subscribe(self, path, callback, nbline=1000, since=None):
+        if path not in self.files:
+            tailed = TailedFile(path)
+            tailed.open(fromEnd=True)
+            self.files[path] = tailed
+            self.watch(path)
+
+        tailed = self.files[path]
+        tailed.callbacks.append(callback)
+
+        if not self.timer.isActive():
+            self.timer.start()
+
+        return tailed.backfill(nbline, since=since)
+
+    def position(self, path):
+        tailed = self.files.get(path)
+        return None if tailed is None else tailed.position
+
+    def unsubscribe(self, path, callback):
+        tailed = self.files.get(path)
+        if tailed is None or callback not in tailed.callbacks:
+            return
+
+        tailed.callbacks.remove(callback)
+
+        if not tailed.callbacks:
+            tailed.close()
+            self.files.pop(path)
+            if path in self.watcher.files():
+                self.watcher.removePath(path)
+
+            directory = os.path.dirname(path)
+            if directory in self.watcher.directories() and not [other for other in self.files if
+                                                                os.path.dirname(other) == directory]:
+                self.watcher.removePath(directory)
+
+        if not self.files:
+            self.timer.stop()
+
+    def watch(self, path):
+        directory = os.path.dirname(path)
+
+        if os.path.isdir(directory) and directory not in self.watcher.directories():
+            self.watcher.addPath(directory)
+
+        if os.path.exists(path) and path not in self.watcher.files():
+            self.watcher.addPath(path)
+
+    def fileChanged(self, path):
+        self.update(path)
+
+    def directoryChanged(self, directory):
+        for path in [path for path in self.files if os.path.dirname(path) == directory]:
+            self.update(path)
+
+    def poll(self):
+        for path in list(self.files):
+            self.update(path)
+
+    def update(self, path):
+        tailed = self.files.get(path)
+        if tailed is None:
+            return
+
+        # a rotated or recreated file drops out of the watcher.
+        self.watch(path)
+        lines = tailed.readLines()
+
+        if not lines:
+            return
+
+        for callback in list(tailed.callbacks):
+            callback(lines)
+
+
+class RawLogArea(LogView):
+    capacity = 20000
+    nbline = 2000
+    chunkSize = 200
+
+    def __init__(self, tailer, actor, capacity=None):
+        LogView.__init__(self, capacity=capacity)
         self.setMinimumSize(400, 180)
+        self.tailer = tailer
         self.actor = actor
+        self.logfile = os.path.expandvars('$ICS_MHS_LOGS_ROOT/actors/%s/current.log' % actor)
+        self.subscribed = False
+        self.position = None
+        self.backlog = deque()
 
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.parseLog)
-        self.timer.setInterval(RawLogArea.refresh * 1000)
-        self.timer.start()
+        self.loader = QTimer(self)
+        self.loader.setSingleShot(True)
+        self.loader.setInterval(0)
+        self.loader.timeout.connect(self.loadChunk)
+
+    def showEvent(self, event):
+        if not self.subscribed:
+            self.subscribed = True
+            # only read what was written since this area was last hidden, if anything.
+            self.backlog.extend(self.tailer.subscribe(self.logfile, self.newLines, nbline=RawLogArea.nbline,
+                                                      since=self.position))
+        if self.backlog:
+            self.loader.start()
 
-        self.setMaximumBlockCount(RawLogArea.maxBlockCount)
-        self.setReadOnly(True)
+        LogView.showEvent(self, event)
 
-        self.setStyleSheet("background-color: black;color:white;")
-        self.setFont(QFont("Monospace",  styles.smallFont))
+    def hideEvent(self, event):
+        if self.subscribed:
+            self.position = self.tailer.position(self.logfile)
+            self.tailer.unsubscribe(self.logfile, self.newLines)
+            self.subscribed = False
 
-        self.logs = ''
-        self.parseLog(nbline=2000)
+        self.loader.stop()
+        LogView.hideEvent(self, event)
 
-    def newLine(self, newLine):
+    def record(self, line):
         try:
-            code = RawLogArea.colorCode[newLine.split(' ', 21)[20]]
-        except (KeyError, IndexError):
-            code = 'regular'
+            code = line.split(' ', 21)[20].lower()
+        except IndexError:
+            code = 'i'
 
-        color, __ = styles.colorWidget(code)
-        self.appendHtml('\n<font color="%s">%s</font>' % (color, newLine))
+        return LogRecord(timestamp=None, actor=None, code=code, text=line)
 
-    def parseLog(self, nbline=1000):
-        try:
-            logs = self.tail(actor=self.actor, nbline=nbline)
+    def loadChunk(self):
+        chunk = [self.backlog.popleft() for i in range(min(RawLogArea.chunkSize, len(self.backlog)))]
+        self.appendLines(chunk)
+
+        if self.backlog:
+            self.loader.start()
 
-        except FileExistsError:
+    def newLines(self, lines):
+        # keep ordering with a backfill still in progress.
+        if self.backlog:
+            self.backlog.extend(lines)
             return
 
-        ind = logs.find(self.logs[-100:])
-        newLog = logs[ind + 100:]
-        self.logs += newLog
-        self.logs = self.logs[-RawLogArea.maxBytes:]
-
-        for line in (newLog.split('\n')):
-            if line:
-                self.newLine(newLine=line)
-
-        self.moveCursor(QTextCursor.End)
-        self.ensureCursorVisible()
-
-    def tail(self, actor, nbline=1000):
-        logfile = os.path.expandvars('$ICS_MHS_LOGS_ROOT/actors/%s/current.log' % actor)
-        if not (os.path.isfile(logfile)):
-            raise FileExistsError
-        args = ['tail', '-n', '%d' % nbline, logfile]
-        output = subprocess.check_output(args)
-        return output.decode('utf8')
+        self.appendLines(lines)
+
+    def appendLines(self, lines):
+        self.logModel.extend([self.record(line) for line in lines if line])
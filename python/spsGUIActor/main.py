@@ -4,6 +4,8 @@ import argparse
 import os
 import pwd
 import sys
+import time
+from datetime import datetime
 
 from PyQt5.QtWidgets import QApplication, QMainWindow
 from mainwindow import SpsWidget
@@ -25,6 +27,11 @@ class Spsgui(QMainWindow):
         self.show()
         self.setConnected(False)
 
+    def replay(self, replayer, timestamp=None):
+        self.setName('%s (replay)' % self.cmdrName)
+        self.setConnected(True)
+        replayer.start(timestamp=timestamp)
+
     def setConnected(self, isConnected):
         self.isConnected = isConnected
         self.spsWidget.setEnabled(isConnected)
@@ -56,6 +63,12 @@ def main():
     parser = argparse.ArgumentParser()
 
     parser.add_argument('--name', default=pwd.getpwuid(os.getuid()).pw_name, type=str, nargs='?', help='cmdr name')
+    parser.add_argument('--record', default=None, const='', type=str, nargs='?',
+                        help='record hub replies to that file, default to spsgui datadir')
+    parser.add_argument('--replay', default=None, type=str, help='replay a recording instead of connecting to tron')
+    parser.add_argument('--speed', default=1.0, type=float, help='replay speed factor, 0 for max speed')
+    parser.add_argument('--start', default=None, type=datetime.fromisoformat,
+                        help='replay from that time, eg 2021-06-02T23:10:00')
 
     args = parser.parse_args()
 
@@ -65,19 +78,18 @@ def main():
     from twisted.internet import reactor
 
     import miniActor
+    from spsGUIActor.recorder import Recorder, Recording, Replayer
 
-    specIds = [i + 1 for i in range(12)]
-    viscamNames = ['b%i' % i for i in specIds] + ['r%i' % i for i in specIds]
-    nircamNames = ['n%i' % i for i in specIds]
-
-    xcus = ['xcu_%s' % cam for cam in viscamNames + nircamNames]
-    ccds = ['ccd_%s' % cam for cam in viscamNames]
-    hxs = ['hx_%s' % cam for cam in nircamNames]
-    enus = ['enu_sm%i' % i for i in specIds]
-    lam = ['aten', 'sac', 'breva']
-    sps = ['sps', 'dcb', 'dcb2', 'rough1', 'rough2']
+    # models are derived from the [ait] and [smN] sections of spsgui.cfg.
+    actor = miniActor.connectActor(connect=args.replay is None)
+    recorder = None
 
-    actor = miniActor.connectActor(['hub'] + lam + sps + enus + xcus + ccds + hxs)
+    if args.record is not None:
+        datadir = os.path.expandvars(actor.config.get('spsgui', 'datadir'))
+        path = args.record if args.record else os.path.join(datadir, time.strftime('tron-%Y-%m-%dT%H%M%S.rec'))
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        recorder = Recorder(path)
+        recorder.attach(actor.dispatcher)
 
     try:
         ex = Spsgui(reactor, actor, args.name)
@@ -85,9 +97,16 @@ def main():
         actor.disconnectActor()
         raise
 
+    if args.replay is not None:
+        replayer = Replayer(actor.dispatcher, Recording(args.replay), speed=args.speed)
+        ex.replay(replayer, timestamp=None if args.start is None else args.start.timestamp())
+
     reactor.run()
     actor.disconnectActor()
 
+    if recorder is not None:
+        recorder.close()
+
 
 if __name__ == "__main__":
     main()
@@ -1,9 +1,25 @@
 __author__ = 'alefur'
 
+import os
+import time
+from collections import deque
+
+import spsGUIActor.layout as layout
 import spsGUIActor.styles as styles
+import spsGUIActor.theme as theme
+from PyQt5.QtCore import QTimer
 from PyQt5.QtWidgets import QWidget, QMessageBox, QGroupBox, QLabel, QDial
+from spsGUIActor.alarms import Alarms, AlarmButton
 from spsGUIActor.common import GridLayout, HBoxLayout
+from spsGUIActor.derived import Graph
+from spsGUIActor.fanout import Fanout
+from spsGUIActor.fleet import FleetView
+from spsGUIActor.history import History, spillDir
+from spsGUIActor.logs import LogTailer, CmdLogArea, RawLogArea
 from spsGUIActor.module import Aitmodule, Specmodule
+from spsGUIActor.online import OnlineState
+from spsGUIActor.scheduler import FrameScheduler
+from spsGUIActor.staleness import Staleness
 from spsGUIActor.widgets import ValueGB
 
 
@@ -40,8 +56,14 @@ class TronLayout(HBoxLayout):
 
 
 class TronStatus(ValueGB):
+    refreshInterval = 0.25
+    window = 2
+
     def __init__(self, fontSize=styles.smallFont):
         self.fontSize = fontSize
+        self.nMessages = 0
+        self.lastCount = 0
+        self.samples = deque([(time.monotonic(), 0)])
 
         QGroupBox.__init__(self)
         self.setTitle('TRON')
@@ -51,10 +73,42 @@ class TronStatus(ValueGB):
 
         self.value = QLabel()
         self.dial = TronDial()
+        self.rateLabel = QLabel()
 
         self.grid.addWidget(self.value, 0, 0)
         self.grid.addWidget(self.dial, 0, 1)
+        self.grid.addWidget(self.rateLabel, 0, 2)
         self.setLayout(self.grid)
+        self.initTheme()
+        self.rateLabel.setFont(theme.font(self.fontSize))
+
+        # the dial and readout follow the traffic a few times per second, not once per keyword.
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refreshRate)
+        self.timer.start(int(TronStatus.refreshInterval * 1000))
+
+    @property
+    def rate(self):
+        (start, nStart), (end, nEnd) = self.samples[0], self.samples[-1]
+        return (nEnd - nStart) / (end - start) if end > start else 0.
+
+    def heartBeat(self):
+        self.nMessages += 1
+
+    def refreshRate(self):
+        now = time.monotonic()
+        self.samples.append((now, self.nMessages))
+
+        while len(self.samples) > 2 and now - self.samples[0][0] > TronStatus.window:
+            self.samples.popleft()
+
+        if self.nMessages != self.lastCount:
+            self.dial.heartBeat()
+            self.lastCount = self.nMessages
+
+        rateText = '%.0f msgs/s' % self.rate
+        if self.rateLabel.text() != rateText:
+            self.rateLabel.setText(rateText)
 
     def setEnabled(self, isOnline):
         text = 'ONLINE' if isOnline else 'OFFLINE'
@@ -67,7 +121,25 @@ class SpsWidget(QWidget):
     def __init__(self, spsGUI):
         QWidget.__init__(self)
         self.spsGUI = spsGUI
+        theme.install()
+        self.frameScheduler = FrameScheduler(self.actor.config.getfloat('spsgui', 'frameRate',
+                                                                        fallback=FrameScheduler.defaultRate))
+        self.logTailer = LogTailer()
+        self.fanout = Fanout(heartBeat=self.heartBeat)
+        self.history = History(self.fanout, directory=spillDir(self.actor.config),
+                               capacity=self.actor.config.getint('spsgui', 'historySize', fallback=History.capacity),
+                               maxSize=self.actor.config.getint('spsgui', 'historyMaxSize', fallback=History.maxSize))
+        self.logCapacity = self.actor.config.getint('spsgui', 'logCapacity', fallback=CmdLogArea.capacity)
+        self.rawLogCapacity = self.actor.config.getint('spsgui', 'rawLogCapacity', fallback=RawLogArea.capacity)
+        self.derived = Graph(self.fanout)
+        self.staleness = Staleness(self.fanout, self.actor.config)
+        alarmRules = self.actor.config.get('spsgui', 'alarms', fallback=None)
+        self.alarms = Alarms(self.fanout, os.path.expandvars(alarmRules) if alarmRules else None)
+        self.alarms.watchModels(self.actor.models, layout.modelNames(self.actor.config))
+        self.sparklines = self.actor.config.getboolean('spsgui', 'sparklines', fallback=True)
+        self.onlineState = OnlineState(self)
         self.tronLayout = TronLayout()
+        self.tronLayout.insertWidget(1, AlarmButton(self.alarms))
         self.mainLayout = GridLayout()
         self.mainLayout.setSpacing(1)
         self.mainLayout.setContentsMargins(0, 0, 0, 0)
@@ -75,16 +147,37 @@ class SpsWidget(QWidget):
         self.mainLayout.addLayout(self.tronLayout, 0, 0)
         self.mainLayout.addWidget(Aitmodule(self), 1, 0)
 
-        for smId in range(1, 12):
-            if 'sm%d' % smId not in self.actor.config.sections():
-                continue
+        # a single table instead of the grid of spectrograph module widgets, for the large configurations.
+        self.fleetView = FleetView(self) if self.actor.config.getboolean('spsgui', 'compactView',
+                                                                         fallback=False) else None
+
+        for smId, enu, arms in layout.specModules(self.actor.config):
+            if self.fleetView is not None:
+                self.fleetView.addSpecModule(smId, enu=enu, arms=arms)
+            else:
+                self.mainLayout.addWidget(Specmodule(self, smId=smId, enu=enu, arms=arms), smId + 1, 0)
 
-            arms = [arm.strip() for arm in self.actor.config.get('sm%d' % smId, 'arms').split(',') if arm]
-            enu = self.actor.config.getboolean('sm%d' % smId, 'enu')
-            self.mainLayout.addWidget(Specmodule(self, smId=smId, enu=enu, arms=arms), smId + 1, 0)
+        if self.fleetView is not None:
+            self.mainLayout.addWidget(self.fleetView, 2, 0)
 
         self.setLayout(self.mainLayout)
 
+    def addSpecModule(self, smId, enu=True, arms=None):
+        arms = ['b', 'r', 'n'] if arms is None else arms
+        modelNames = layout.specModuleModels(smId, enu, arms)
+        self.actor.addModels(modelNames)
+        self.alarms.watchModels(self.actor.models, modelNames)
+
+        if self.fleetView is not None:
+            self.fleetView.addSpecModule(smId, enu=enu, arms=arms)
+            return self.fleetView
+
+        specModule = Specmodule(self, smId=smId, enu=enu, arms=arms)
+        self.mainLayout.addWidget(specModule, smId + 1, 0)
+        specModule.setEnabled(self.isConnected)
+        self.onlineState.refresh(specModule)
+        return specModule
+
     @property
     def actor(self):
         return self.spsGUI.actor
@@ -101,8 +194,18 @@ class SpsWidget(QWidget):
                                       callFunc=callFunc,
                                       callCodes=keyvar.AllCodes))
 
+    @property
+    def stats(self):
+        tronStatus = self.tronLayout.tronStatus
+        return dict(frameScheduler=self.frameScheduler.stats,
+                    history=self.history.stats,
+                    derived=self.derived.stats,
+                    staleness=self.staleness.stats,
+                    alarms=self.alarms.stats,
+                    tron=dict(messages=tronStatus.nMessages, rate=tronStatus.rate))
+
     def heartBeat(self):
-        self.tronLayout.tronStatus.dial.heartBeat()
+        self.tronLayout.tronStatus.heartBeat()
 
     def showError(self, title, error):
         reply = QMessageBox.critical(self, title, error, QMessageBox.Ok)
@@ -112,3 +215,5 @@ class SpsWidget(QWidget):
 
         for widget in widgets:
             widget.setEnabled(a0)
+
+        self.onlineState.refresh()
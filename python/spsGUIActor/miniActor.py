@@ -1,6 +1,7 @@
 import logging
 
 import actorcore.ICC
+import spsGUIActor.layout as layout
 
 
 class OurActor(actorcore.ICC.ICC):
@@ -8,6 +9,7 @@ class OurActor(actorcore.ICC.ICC):
         # This sets up the connections to/from the hub, the logger, and the twisted reactor.
         #
         modelNames = [] if modelNames is None else modelNames
+        self.droppedModels = dict()
         actorcore.ICC.ICC.__init__(self, name,
                                    productName=productName,
                                    configFile=configFile,
@@ -15,15 +17,56 @@ class OurActor(actorcore.ICC.ICC):
 
         self.logger.setLevel(logLevel)
 
+    @property
+    def dispatcher(self):
+        return self.models['hub'].dispatcher
+
+    def addModels(self, modelNames):
+        modelNames = [name for name in modelNames if name not in self.models]
+        restored = [name for name in modelNames if name in self.droppedModels]
+
+        # opscore models can only be instantiated once, dropped ones are re-attached to the dispatcher instead.
+        for name in restored:
+            model = self.droppedModels.pop(name)
+            for keyVar in model.keyVarDict.values():
+                model.dispatcher.addKeyVar(keyVar)
+            self.models[name] = model
+
+        actorcore.ICC.ICC.addModels(self, [name for name in modelNames if name not in restored])
+        self.listen('addActors', restored)
+
+    def dropModels(self, modelNames):
+        modelNames = [name for name in modelNames if name in self.models and name != 'hub']
+
+        for name in modelNames:
+            model = self.models.pop(name)
+            for keyVar in model.keyVarDict.values():
+                model.dispatcher.removeKeyVar(keyVar)
+            self.droppedModels[name] = model
+
+        self.listen('delActors', modelNames)
+
+    def listen(self, action, modelNames):
+        if not modelNames or getattr(self, 'cmdr', None) is None:
+            return
+
+        self.cmdr.bgCall(None, 'hub', 'listen %s %s' % (action, ' '.join(modelNames)))
+
     def disconnectActor(self):
         self.shuttingDown = True
 
 
-def connectActor(modelNames):
+def connectActor(modelNames=None, connect=True):
     theActor = OurActor('spsgui',
                         productName='spsGUIActor',
-                        modelNames=modelNames,
+                        modelNames=['hub'],
                         logLevel=logging.DEBUG)
 
-    theActor.run(doReactor=False)
+    modelNames = layout.modelNames(theActor.config) if modelNames is None else modelNames
+    theActor.addModels(modelNames)
+
+    # a replayed session feeds the models from a recording, there is no hub to connect to.
+    if connect:
+        theActor.run(doReactor=False)
+
     return theActor
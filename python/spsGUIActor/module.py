@@ -1,6 +1,7 @@
 __author__ = 'alefur'
 
 import spsGUIActor.dcb as dcb
+import spsGUIActor.layout as layout
 import spsGUIActor.styles as styles
 from PyQt5.QtWidgets import QGroupBox
 from spsGUIActor.aten import AtenRow
@@ -33,23 +34,17 @@ class Module(QGroupBox):
                     continue
                 self.grid.addWidget(widget, i, j)
 
-    def setEnabled(self, a0: bool) -> None:
-        for row in self.rows:
-            row.setOnline(a0)
-
-        QGroupBox.setEnabled(self, a0)
-
     def setStyleSheet(self, styleSheet=None):
-        styleSheet = "QGroupBox {font-size: %ipt;border: 1px solid lightgray;border-radius: 3px;margin-top: 6px;} " % round(
+        styleSheet = "Module {font-size: %ipt;border: 1px solid lightgray;border-radius: 3px;margin-top: 6px;} " % round(
             0.9 * styles.bigFont) \
-                     + "QGroupBox::title {subcontrol-origin: margin;subcontrol-position: top left; padding: 0 0px;}"
+                     + "Module::title {subcontrol-origin: margin;subcontrol-position: top left; padding: 0 0px;}"
         QGroupBox.setStyleSheet(self, styleSheet)
 
 
 class Aitmodule(Module):
     def __init__(self, mwindow):
         Module.__init__(self, mwindow=mwindow, title='AIT')
-        actors = [actor.strip() for actor in mwindow.actor.config.get('ait', 'actors').split(',')]
+        actors = layout.aitActors(mwindow.actor.config)
 
         self.dcbs = []
 
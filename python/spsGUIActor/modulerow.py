@@ -1,11 +1,10 @@
 __author__ = 'alefur'
 
-from functools import partial
-
 import spsGUIActor.styles as styles
-from PyQt5.QtCore import QTimer
+import spsGUIActor.theme as theme
 from PyQt5.QtWidgets import QGroupBox, QGridLayout
 from spsGUIActor.common import PushButton
+from spsGUIActor.control import LazyDialog
 from spsGUIActor.widgets import ValueGB
 
 
@@ -15,6 +14,8 @@ class ModuleRow(object):
         self.module = module
         self.actorName = actorName
         self.actorLabel = actorLabel
+        self.online = self.mwindow.onlineState.isOnline(actorName)
+        self.mwindow.onlineState.register(self)
         self.actorStatus = ActorGB(self, fontSize=fontSize)
         self.actorStatus.button.clicked.connect(self.showDetails)
 
@@ -32,7 +33,7 @@ class ModuleRow(object):
 
     @property
     def isOnline(self):
-        return self.mwindow.isConnected and self.actorName in self.models['hub'].keyVarDict['actors']
+        return self.online
 
     @property
     def displayed(self):
@@ -43,23 +44,34 @@ class ModuleRow(object):
         return []
 
     def setOnline(self, isOnline=None):
-        isOnline = isOnline if isOnline is not None else self.isOnline
+        isOnline = isOnline if isOnline is not None else self.mwindow.onlineState.isOnline(self.actorName)
+        self.online = isOnline
 
         for widget in self.displayed + [self.controlDialog]:
             widget.setEnabled(isOnline)
 
-    def createDialog(self, controlDialog):
-        self.controlDialog = controlDialog
+    def createDialog(self, dialogClass):
+        self.controlDialog = LazyDialog(self, dialogClass)
+
+        # controllers may already be current, its first sweep was deferred until the dialog existed.
+        if hasattr(self, 'controllers') and self.controllers.keyvar.isCurrent:
+            self.controllers.updateWidgets()
+
+    def dialogLoaded(self):
+        self.setOnline()
+
+        if hasattr(self, 'controllers'):
+            self.controllers.updateWidgets()
 
     def showDetails(self):
-        self.controlDialog.activateWindow()
-        self.controlDialog.setVisible(True)
+        controlDialog = self.controlDialog.load()
+        controlDialog.activateWindow()
+        controlDialog.setVisible(True)
 
 
 class ActorGB(ValueGB, QGroupBox):
     def __init__(self, moduleRow, fontSize=styles.bigFont):
         self.moduleRow = moduleRow
-        self.keyvar = moduleRow.models['hub'].keyVarDict['actors']
         self.fontSize = fontSize
 
         QGroupBox.__init__(self)
@@ -73,23 +85,20 @@ class ActorGB(ValueGB, QGroupBox):
         self.grid.setContentsMargins(0, 0, 0, 0)
         self.setLayout(self.grid)
         self.grid.addWidget(self.button, 0, 0)
-
-        QTimer.singleShot(1000, self.attachCallback)
-
-    def attachCallback(self):
-        self.cb = partial(self.newConnection)
-        self.keyvar.addCallback(self.cb, callNow=True)
-
-    def newConnection(self, keyvar):
-        self.moduleRow.setOnline()
+        self.initTheme()
+        self.setEnabled(moduleRow.isOnline)
 
     def setEnabled(self, isOnline):
         self.setColor(*styles.colorWidget('online' if isOnline else 'offline'))
 
+    def initTheme(self):
+        self.button.setStyleSheet('')
+        theme.apply(self, theme='true', fontPt='%d' % theme.groupBoxFont(self.fontSize))
+        theme.apply(self.button, fontPt='%d' % self.fontSize)
+
     def setColor(self, background, police='white'):
-        bckColor = ValueGB.setBackground(self, background=background)
-        self.button.setStyleSheet(
-            "QPushButton{font-size: %ipt; background: %s; color:%s; }" % (self.fontSize, bckColor, police))
+        ValueGB.setBackground(self, background=background)
+        theme.apply(self.button, background=background, police=police)
 
     def setText(self, txt):
         self.button.setText(txt)
@@ -0,0 +1,50 @@
+__author__ = 'alefur'
+
+
+class OnlineState(object):
+    def __init__(self, mwindow):
+        self.mwindow = mwindow
+        self.actors = set()
+        self.rows = dict()
+        self.nodes = dict()
+
+        self.keyvar = mwindow.actor.models['hub'].keyVarDict['actors']
+        self.keyvar.addCallback(self.newActors, callNow=self.keyvar.isCurrent)
+
+    def register(self, moduleRow):
+        self.rows.setdefault(moduleRow.actorName, []).append(moduleRow)
+
+    def isOnline(self, actorName):
+        return self.mwindow.isConnected and actorName in self.actors
+
+    def node(self, actorName):
+        # online state as a source of the derived graph, for aggregates and views which are not made of module rows.
+        if actorName not in self.nodes:
+            self.nodes[actorName] = self.mwindow.derived.source(('online', actorName), value=self.isOnline(actorName))
+
+        return self.nodes[actorName]
+
+    def setNodes(self, actorNames):
+        for actorName in actorNames:
+            self.nodes[actorName].set(self.isOnline(actorName))
+
+        self.mwindow.derived.propagate()
+
+    def newActors(self, keyvar):
+        actors = set(keyvar)
+        # only the rows whose actor came or left need to be refreshed.
+        changed, self.actors = actors ^ self.actors, actors
+        self.setNodes([actorName for actorName in changed if actorName in self.nodes])
+
+        for actorName in changed:
+            for moduleRow in self.rows.get(actorName, []):
+                moduleRow.setOnline()
+
+    def refresh(self, module=None):
+        # the hub connection itself changed, every row of that module (or all of them) needs to be refreshed.
+        self.setNodes(list(self.nodes))
+
+        for moduleRows in self.rows.values():
+            for moduleRow in moduleRows:
+                if module is None or moduleRow.module is module:
+                    moduleRow.setOnline()
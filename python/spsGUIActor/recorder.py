@@ -0,0 +1,236 @@
+__author__ = 'alefur'
+
+import bisect
+import os
+import struct
+import time
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+# A recording is a magic string followed by (timestamp, length) headers, each followed by the raw reply string as
+# received from tron, so commander, cmdId, actor, code and keywords are all kept and replayed as they were parsed.
+# The sidecar index maps a timestamp to a record offset every indexInterval seconds of traffic.
+magic = b'SPSGUI-TRON\x01'
+recordHeader = struct.Struct('<dI')
+indexEntry = struct.Struct('<dQ')
+
+
+def indexPath(path):
+    return '%s.idx' % path
+
+
+class Recorder(object):
+    indexInterval = 10
+    flushInterval = 1
+
+    def __init__(self, path):
+        self.path = path
+        isNew = not os.path.isfile(path) or not os.path.getsize(path)
+
+        self.file = open(path, 'ab')
+        self.index = open(indexPath(path), 'ab')
+        if isNew:
+            self.file.write(magic)
+
+        self.dispatcher = None
+        self.lastIndexed = None
+        self.nRecorded = 0
+
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.flush)
+        self.timer.start(int(Recorder.flushInterval * 1000))
+
+    def attach(self, dispatcher):
+        # every reply read from the hub goes through dispatchReplyStr, record it before dispatching.
+        self.dispatcher = dispatcher
+        self.dispatchReplyStr = dispatcher.dispatchReplyStr
+        dispatcher.dispatchReplyStr = self.dispatch
+
+    def detach(self):
+        if self.dispatcher is None:
+            return
+
+        self.dispatcher.dispatchReplyStr = self.dispatchReplyStr
+        self.dispatcher = None
+
+    def dispatch(self, replyStr):
+        self.record(replyStr)
+        return self.dispatchReplyStr(replyStr)
+
+    def record(self, replyStr, timestamp=None):
+        timestamp = time.time() if timestamp is None else timestamp
+
+        if self.lastIndexed is None or timestamp - self.lastIndexed >= Recorder.indexInterval:
+            self.index.write(indexEntry.pack(timestamp, self.file.tell()))
+            self.lastIndexed = timestamp
+
+        data = replyStr.encode('utf8')
+        self.file.write(recordHeader.pack(timestamp, len(data)))
+        self.file.write(data)
+        self.nRecorded += 1
+
+    def flush(self):
+        # data first, an index entry must never point past the end of the recording.
+        self.file.flush()
+        self.index.flush()
+
+    def close(self):
+        self.detach()
+        self.timer.stop()
+        self.flush()
+        self.file.close()
+        self.index.close()
+
+
+class Recording(object):
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+
+        if self.file.read(len(magic)) != magic:
+            raise ValueError('%s is not a tron recording' % path)
+
+        self.index = self.loadIndex()
+        self.timestamps = [timestamp for timestamp, offset in self.index]
+
+    @property
+    def startTime(self):
+        return self.index[0][0] if self.index else None
+
+    def loadIndex(self):
+        size = os.path.getsize(self.path)
+
+        try:
+            with open(indexPath(self.path), 'rb') as index:
+                data = index.read()
+        except OSError:
+            return self.buildIndex()
+
+        data = data[:len(data) - len(data) % indexEntry.size]
+        return [(timestamp, offset) for timestamp, offset in indexEntry.iter_unpack(data) if offset < size]
+
+    def buildIndex(self):
+        index = []
+        self.rewind()
+
+        while True:
+            offset = self.file.tell()
+            record = self.read()
+            if record is None:
+                break
+
+            timestamp, replyStr = record
+            if not index or timestamp - index[-1][0] >= Recorder.indexInterval:
+                index.append((timestamp, offset))
+
+        with open(indexPath(self.path), 'wb') as indexFile:
+            indexFile.write(b''.join(indexEntry.pack(timestamp, offset) for timestamp, offset in index))
+
+        self.rewind()
+        return index
+
+    def rewind(self):
+        self.file.seek(len(magic))
+
+    def read(self):
+        header = self.file.read(recordHeader.size)
+        if len(header) < recordHeader.size:
+            return None
+
+        timestamp, length = recordHeader.unpack(header)
+        data = self.file.read(length)
+        # a recording still being written can end with a truncated record.
+        if len(data) < length:
+            return None
+
+        return timestamp, data.decode('utf8', errors='replace')
+
+    def seek(self, timestamp):
+        i = bisect.bisect_right(self.timestamps, timestamp) - 1
+        if i < 0:
+            self.rewind()
+        else:
+            self.file.seek(self.index[i][1])
+
+        # at most indexInterval seconds of traffic to skip from there.
+        while True:
+            offset = self.file.tell()
+            record = self.read()
+            if record is None or record[0] >= timestamp:
+                self.file.seek(offset)
+                return
+
+    def close(self):
+        self.file.close()
+
+
+class Replayer(QObject):
+    batchSize = 500
+    maxDelay = 1
+    finished = pyqtSignal()
+
+    def __init__(self, dispatcher, recording, speed=1.0):
+        QObject.__init__(self)
+        self.dispatcher = dispatcher
+        self.recording = recording
+        self.speed = speed
+        self.next = None
+        self.origin = None
+        self.nReplayed = 0
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.step)
+
+    @property
+    def maxSpeed(self):
+        return not self.speed
+
+    @property
+    def replayTime(self):
+        if self.next is None:
+            return None
+        if self.maxSpeed:
+            return self.next[0]
+
+        recordTime, wallTime = self.origin
+        return recordTime + (time.monotonic() - wallTime) * self.speed
+
+    def start(self, timestamp=None):
+        if timestamp is not None:
+            self.recording.seek(timestamp)
+
+        self.next = self.recording.read()
+        self.setSpeed(self.speed)
+
+    def setSpeed(self, speed):
+        # speed is a factor on the recorded pace, 0 or None replays as fast as the models can take it.
+        self.speed = speed
+        if self.next is None:
+            return
+
+        self.origin = (self.next[0], time.monotonic())
+        self.timer.start(0)
+
+    def stop(self):
+        self.timer.stop()
+
+    def step(self):
+        now = self.replayTime
+        nDispatched = 0
+
+        while self.next is not None and nDispatched < Replayer.batchSize and self.next[0] <= now:
+            timestamp, replyStr = self.next
+            self.dispatcher.dispatchReplyStr(replyStr)
+            self.nReplayed += 1
+            nDispatched += 1
+            self.next = self.recording.read()
+            now = self.replayTime if self.maxSpeed else now
+
+        if self.next is None:
+            self.finished.emit()
+            return
+
+        # long silences are waited in steps, so that a speed change is taken into account.
+        delay = 0 if self.maxSpeed else max(0, (self.next[0] - now) / self.speed)
+        self.timer.start(int(min(delay, Replayer.maxDelay) * 1000))
@@ -1,9 +1,10 @@
 __author__ = 'alefur'
 
 from spsGUIActor.cam.xcu.gauge import GaugePanel
-from spsGUIActor.rough.pump import PumpPanel
+from spsGUIActor.rough.pump import PumpPanel, pumpTrends
 from spsGUIActor.control import ControlDialog, MultiplePanel
 from spsGUIActor.modulerow import ModuleRow
+from spsGUIActor.trend import registerTrends
 from spsGUIActor.widgets import Controllers, ValueMRow
 
 
@@ -17,7 +18,9 @@ class RoughRow(ModuleRow):
         self.pressure = ValueMRow(self, 'pressure', 'Pressure(Torr)', 0, '{:g}', controllerName='gauge')
 
         self.controllers = Controllers(self)
-        self.createDialog(RoughDialog(self))
+        registerTrends(self, pumpTrends)
+        self.speed.showSparkline()
+        self.createDialog(RoughDialog)
 
     @property
     def widgets(self):
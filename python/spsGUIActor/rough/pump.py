@@ -3,6 +3,7 @@ import spsGUIActor.styles as styles
 from spsGUIActor.cam import CamDevice
 from spsGUIActor.common import LineEdit
 from spsGUIActor.control import ControllerCmd
+from spsGUIActor.trend import TrendPanel
 from spsGUIActor.widgets import ValueGB, SwitchButton, CustomedCmd
 
 
@@ -65,6 +66,9 @@ class RawCmd(CustomedCmd):
         return cmdStr
 
 
+pumpTrends = [('pumpSpeed', 0, 'Speed')]
+
+
 class PumpPanel(CamDevice):
     def __init__(self, controlDialog):
         CamDevice.__init__(self, controlDialog, 'pump')
@@ -87,6 +91,8 @@ class PumpPanel(CamDevice):
         self.tipSealLife = ValueGB(self.moduleRow, 'pumpLife', 'Tip Seal Life', 1, '{:g}')
         self.bearingLife = ValueGB(self.moduleRow, 'pumpLife', 'Bearing Life', 2, '{:g}')
 
+        self.trend = TrendPanel(self.moduleRow, pumpTrends, title='Speed(Hz)')
+
 
     def setInLayout(self):
         self.grid.addWidget(self.speed, 0, 0, 2, 1)
@@ -105,6 +111,8 @@ class PumpPanel(CamDevice):
         self.grid.addWidget(self.warnings, 2, 1, 1, 2)
         self.grid.addWidget(self.errors, 3, 1, 1, 2)
 
+        self.grid.addWidget(self.trend, 7, 0, 1, 3)
+
 
 
 
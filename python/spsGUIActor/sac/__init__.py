@@ -16,7 +16,7 @@ class SacRow(ModuleRow):
 
         self.pentaPosition = ValueMRow(self, 'lsPenta', 'Penta', 2, '{:.3f}')
         self.detectorPosition = ValueMRow(self, 'lsDetector', 'Detector', 2, '{:.3f}')
-        self.createDialog(SacDialog(self))
+        self.createDialog(SacDialog)
 
     @property
     def widgets(self):
@@ -0,0 +1,75 @@
+__author__ = 'alefur'
+
+from PyQt5.QtCore import QTimer
+
+
+class FrameScheduler(object):
+    defaultRate = 20
+
+    def __init__(self, frameRate=None):
+        frameRate = FrameScheduler.defaultRate if frameRate is None else frameRate
+        # latest formatted value per widget, rendered once per frame.
+        self.dirty = dict()
+        # latest formatted value per hidden widget, rendered once it is shown.
+        self.hidden = dict()
+        self.nReceived = 0
+        self.nRendered = 0
+        self.nHits = 0
+        self.nMisses = 0
+        self.nHidden = 0
+
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+        self.setFrameRate(frameRate)
+
+    @property
+    def stats(self):
+        return dict(received=self.nReceived, rendered=self.nRendered, dirty=len(self.dirty), hits=self.nHits,
+                    misses=self.nMisses, hidden=self.nHidden, pending=len(self.hidden))
+
+    def setFrameRate(self, frameRate):
+        self.timer.setInterval(max(1, int(round(1000 / frameRate))))
+
+    def push(self, widget, strValue):
+        self.nReceived += 1
+
+        # status sweeps resend everything, nothing to do if that is what is already displayed.
+        if widget not in self.dirty and widget not in self.hidden and widget.lastRendered == widget.renderKey(strValue):
+            self.nHits += 1
+            return
+
+        self.nMisses += 1
+
+        # closed dialogs and background tabs, only the newest value matters once they are shown.
+        if not widget.isVisible():
+            self.nHidden += 1
+            self.hidden[widget] = strValue
+            return
+
+        self.hidden.pop(widget, None)
+
+        if not widget.coalesce:
+            self.render(widget, strValue)
+            return
+
+        self.dirty[widget] = strValue
+
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def reveal(self, widget):
+        strValue = self.hidden.pop(widget, None)
+
+        if strValue is not None:
+            self.render(widget, strValue)
+
+    def flush(self):
+        dirty, self.dirty = self.dirty, dict()
+
+        for widget, strValue in dirty.items():
+            self.render(widget, strValue)
+
+    def render(self, widget, strValue):
+        self.nRendered += 1
+        widget.refresh(strValue)
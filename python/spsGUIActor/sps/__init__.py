@@ -17,7 +17,7 @@ class SpecModuleRow(ModuleRow):
         self.specLabel = SpecLabel(self, smId)
         self.lightSource = ValueMRow(self, f'sm{smId}LightSource', 'Light Source', 0, '{:s}')
 
-        self.createDialog(SpsDialog(self))
+        self.createDialog(SpsDialog)
 
     @property
     def widgets(self):
@@ -14,8 +14,8 @@ class SpecLabel(ValueGB):
     def specName(self):
         return f'sm{self.smId}'
 
-    def updateVals(self, ind, fmt, keyvar):
-        self.updateWidgets(keyvar.getValue(doRaise=False))
+    def updateVals(self, values):
+        self.updateWidgets(values)
 
     def updateWidgets(self, specModules=None):
         specModules = self.keyvar.getValue(doRaise=False) if specModules is None else specModules
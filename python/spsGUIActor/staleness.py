@@ -0,0 +1,150 @@
+__author__ = 'alefur'
+
+import time
+import weakref
+
+from PyQt5.QtCore import QTimer
+from spsGUIActor.fanout import isAlive
+
+
+class TimerWheel(object):
+    """ Hashed timer wheel, a key is in a single slot and advancing only looks at the slots of the elapsed ticks. """
+
+    def __init__(self, nSlots=4096, resolution=1.0, now=None):
+        self.nSlots = nSlots
+        self.resolution = resolution
+        self.slots = [dict() for i in range(nSlots)]
+        self.slotOf = dict()
+        self.tick = int((time.monotonic() if now is None else now) // resolution)
+
+    def __contains__(self, key):
+        return key in self.slotOf
+
+    def __len__(self):
+        return len(self.slotOf)
+
+    def schedule(self, key, deadline):
+        self.cancel(key)
+        tick = max(int(deadline // self.resolution), self.tick + 1)
+        slot = tick % self.nSlots
+
+        self.slots[slot][key] = tick
+        self.slotOf[key] = slot
+
+    def cancel(self, key):
+        slot = self.slotOf.pop(key, None)
+        if slot is not None:
+            self.slots[slot].pop(key)
+
+    def advance(self, now):
+        expired = []
+        target = int(now // self.resolution)
+
+        # after a long stall, a full turn has been through every slot already.
+        if target - self.tick > self.nSlots:
+            self.tick = target - self.nSlots
+
+        while self.tick < target:
+            self.tick += 1
+            slot = self.slots[self.tick % self.nSlots]
+            # keys due in a later turn of the wheel stay where they are.
+            for key in [key for key, tick in slot.items() if tick <= self.tick]:
+                slot.pop(key)
+                self.slotOf.pop(key)
+                expired.append(key)
+
+        return expired
+
+
+class Staleness(object):
+    """ Flags the tiles of keywords which did not update for longer than their [staleness] threshold.
+
+    Updates only record their time, a key is looked at when its wheel entry expires, and rescheduled if it was
+    updated in the meantime.
+    """
+    resolution = 1.0
+
+    def __init__(self, fanout, config):
+        self.fanout = fanout
+        self.thresholds = dict(config.items('staleness')) if config.has_section('staleness') else dict()
+        self.default = float(self.thresholds.pop('default', 0))
+        self.keys = dict()
+        self.lastUpdate = dict()
+        self.stale = set()
+        self.wheel = TimerWheel(resolution=Staleness.resolution)
+
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.tick)
+        self.timer.start(int(Staleness.resolution * 1000))
+
+    @property
+    def stats(self):
+        return dict(tracked=len(self.keys), scheduled=len(self.wheel), stale=len(self.stale))
+
+    def threshold(self, actor, key):
+        # configparser keys are lower case, actor.keyword takes precedence over keyword.
+        for name in ['%s.%s' % (actor, key), key]:
+            if name.lower() in self.thresholds:
+                return float(self.thresholds[name.lower()])
+
+        return self.default
+
+    def track(self, keyvar, widget):
+        key = (keyvar.actor, keyvar.name)
+
+        if key not in self.keys:
+            threshold = self.threshold(*key)
+            # keywords only generated on change can never be stale.
+            if not threshold:
+                return
+
+            self.keys[key] = (threshold, [])
+            self.fanout.addListener(keyvar, self.newValues)
+
+        self.keys[key][1].append(weakref.ref(widget))
+
+        # the keyword may have been received before being tracked, e.g. by a dialog loaded later.
+        if key not in self.lastUpdate and keyvar.isCurrent:
+            self.lastUpdate[key] = time.monotonic()
+
+        if key in self.lastUpdate:
+            self.schedule(key)
+
+        widget.setStale(key in self.stale)
+
+    def widgets(self, key):
+        threshold, refs = self.keys[key]
+        refs = [ref for ref in refs if isAlive(ref())]
+        self.keys[key] = (threshold, refs)
+
+        return [ref() for ref in refs]
+
+    def newValues(self, keyvar, values):
+        key = (keyvar.actor, keyvar.name)
+        now = time.monotonic()
+        self.lastUpdate[key] = now
+
+        if key in self.stale:
+            self.stale.discard(key)
+            for widget in self.widgets(key):
+                widget.setStale(False)
+
+        self.schedule(key)
+
+    def schedule(self, key):
+        # a stale key is only rescheduled by its next update.
+        if key not in self.wheel and key not in self.stale:
+            self.wheel.schedule(key, self.lastUpdate[key] + self.keys[key][0])
+
+    def tick(self):
+        now = time.monotonic()
+
+        for key in self.wheel.advance(now):
+            deadline = self.lastUpdate[key] + self.keys[key][0]
+            if deadline > now:
+                self.wheel.schedule(key, deadline)
+                continue
+
+            self.stale.add(key)
+            for widget in self.widgets(key):
+                widget.setStale(True)
@@ -206,6 +206,7 @@ state2color = {"default": ('window', 'black'),
                "loaded": ('orange', 'white'),
                "safestop": ('orange', 'white'),
                "offline": ('specialblack', 'white'),
+               "stale": ('lightslategray', 'white'),
                "abort": ('red', 'white'),
                "failed": ('red', 'white'),
                "error": ('red', 'white'),
@@ -218,3 +219,8 @@ state2color = {"default": ('window', 'black'),
 
 def colorWidget(key):
     return state2color[key.lower()]
+
+# curves of the trend plots, in order.
+trendColors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22',
+               '#17becf', '#393b79', '#637939', '#8c6d31', '#843c39', '#7b4173', '#3182bd', '#e6550d', '#31a354',
+               '#756bb1', '#636363']
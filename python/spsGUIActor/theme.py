@@ -0,0 +1,107 @@
+__author__ = 'alefur'
+
+import spsGUIActor.styles as styles
+from PyQt5.QtGui import QColor, QFont, QPalette, QBrush, QLinearGradient, QGradient
+from PyQt5.QtWidgets import QApplication
+
+# Group box states are described by dynamic properties, matched by a single application stylesheet which is parsed
+# once. Changing state is then a setProperty + polish instead of building and parsing a new stylesheet.
+# Labels are not styled at all, they only swap a cached palette.
+fontSizes = range(6, 17)
+polices = ['white', 'black']
+palettes = dict()
+fonts = dict()
+brushes = dict()
+
+
+def gradient(background):
+    col1, col2 = styles.colormap(background)
+    return 'qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1, stop: 0  %s, stop: 1 %s)' % (col1, col2)
+
+
+def groupBoxFont(fontSize):
+    return max(8, round(0.85 * fontSize))
+
+
+def compileStyleSheet():
+    backgrounds = sorted(set([background for background, __ in styles.state2color.values()] + ['red', 'green']))
+
+    rules = ['QGroupBox[theme="true"] {border: 1px solid gray;border-radius: 3px;margin-top: 1ex;}',
+             'QGroupBox[theme="true"]::title {subcontrol-origin: margin;subcontrol-position: top center; padding: 0 0px;}']
+
+    for fontSize in fontSizes:
+        rules.extend(['%s[fontPt="%d"] {font-size: %ipt;}' % (widget, fontSize, fontSize)
+                      for widget in ['QGroupBox', 'QPushButton']])
+
+    for police in polices:
+        rules.append('QPushButton[police="%s"] {color: %s;}' % (police, police))
+
+    for background in backgrounds:
+        bckColor = gradient(background)
+        rules.append('QGroupBox[background="%s"] {background-color: %s;}' % (background, bckColor))
+        rules.append('QPushButton[background="%s"] {background: %s;}' % (background, bckColor))
+
+    return '\n'.join(rules)
+
+
+def install(app=None):
+    app = QApplication.instance() if app is None else app
+    app.setStyleSheet(compileStyleSheet())
+
+
+def apply(widget, **properties):
+    changed = False
+
+    for name, value in properties.items():
+        if widget.property(name) != value:
+            widget.setProperty(name, value)
+            changed = True
+
+    if changed:
+        style = widget.style()
+        style.unpolish(widget)
+        style.polish(widget)
+        widget.update()
+
+    return changed
+
+
+def palette(police):
+    if police not in palettes:
+        pal = QPalette(QApplication.palette())
+        for group in [QPalette.Active, QPalette.Inactive, QPalette.Disabled]:
+            pal.setColor(group, QPalette.WindowText, QColor(police))
+        palettes[police] = pal
+
+    return palettes[police]
+
+
+def brush(background):
+    # same gradient as the stylesheets, for the views which paint their cells themselves.
+    if background not in brushes:
+        col1, col2 = styles.colormap(background)
+        gradient = QLinearGradient(0, 0, 0, 1)
+        gradient.setCoordinateMode(QGradient.ObjectBoundingMode)
+        gradient.setColorAt(0, QColor('#%s' % col1.lstrip('#')))
+        gradient.setColorAt(1, QColor('#%s' % col2.lstrip('#')))
+        brushes[background] = QBrush(gradient)
+
+    return brushes[background]
+
+
+def font(fontSize):
+    if fontSize not in fonts:
+        qfont = QFont(QApplication.font())
+        qfont.setPointSize(fontSize)
+        fonts[fontSize] = qfont
+
+    return fonts[fontSize]
+
+
+def setPolice(label, police):
+    if label.property('police') == police:
+        return False
+
+    label.setProperty('police', police)
+    label.setPalette(palette(police))
+    return True
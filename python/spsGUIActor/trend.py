@@ -0,0 +1,337 @@
+__author__ = 'alefur'
+
+import time
+
+import numpy as np
+import spsGUIActor.styles as styles
+import spsGUIActor.theme as theme
+from PyQt5.QtCore import QTimer, Qt, QRectF
+from PyQt5.QtGui import QPainter, QPainterPath, QPen, QColor, QTransform
+from PyQt5.QtWidgets import QWidget, QGroupBox, QSizePolicy
+from spsGUIActor.common import GridLayout, ComboBox
+
+spans = dict([('1h', 3600), ('6h', 6 * 3600), ('24h', 24 * 3600)])
+
+
+def minMaxBuckets(timestamps, values, bucketWidth):
+    """ Bucket indices of the samples, and the min/max value of each bucket. """
+    valid = np.isfinite(values)
+    timestamps, values = timestamps[valid], values[valid]
+
+    if not len(values):
+        return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+
+    buckets = np.floor(timestamps / bucketWidth).astype(np.int64)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+
+    return buckets[starts], np.minimum.reduceat(values, starts), np.maximum.reduceat(values, starts)
+
+
+def registerTrends(moduleRow, series):
+    # trends need the history from startup, not from the first time their dialog is opened.
+    for key, ind, label in series:
+        moduleRow.mwindow.history.register(moduleRow.keyVarDict[key], ind)
+
+
+class Curve(object):
+    """ Min/max envelope of a series, as a path in (bucket, value) coordinates which only grows by complete buckets. """
+    maxGap = 600
+
+    def __init__(self, seriesKey, label, color):
+        self.seriesKey = seriesKey
+        self.label = label
+        self.color = QColor(color)
+        self.reset()
+
+    def reset(self):
+        self.path = QPainterPath()
+        self.buckets = []
+        self.partial = None
+
+    @property
+    def lastBucket(self):
+        return self.buckets[-1][0] if self.buckets else None
+
+    def lineTo(self, path, bucket, low, high, previous, bucketWidth):
+        if previous is None or (bucket - previous) * bucketWidth > Curve.maxGap:
+            path.moveTo(bucket, low)
+        else:
+            path.lineTo(bucket, low)
+
+        if high != low:
+            path.lineTo(bucket, high)
+
+    def update(self, history, bucketWidth, firstBucket, currentBucket, scale):
+        start = firstBucket if self.lastBucket is None else self.lastBucket + 1
+        timestamps, values = history.window(*self.seriesKey, start=start * bucketWidth)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            buckets, lows, highs = minMaxBuckets(timestamps, scale(values), bucketWidth)
+
+        self.partial = None
+
+        for bucket, low, high in zip(buckets.tolist(), lows.tolist(), highs.tolist()):
+            # the current bucket is still filling up, it is drawn apart and only appended once complete.
+            if bucket >= currentBucket:
+                self.partial = (bucket, low, high)
+                break
+
+            self.lineTo(self.path, bucket, low, high, self.lastBucket, bucketWidth)
+            self.buckets.append((bucket, low, high))
+
+        while self.buckets and self.buckets[0][0] < firstBucket:
+            self.buckets.pop(0)
+
+        # the path keeps buckets which scrolled out, rebuilt once they make up most of it.
+        if self.path.elementCount() > 4 * (currentBucket - firstBucket):
+            self.rebuild(bucketWidth)
+
+    def rebuild(self, bucketWidth):
+        self.path = QPainterPath()
+        previous = None
+
+        for bucket, low, high in self.buckets:
+            self.lineTo(self.path, bucket, low, high, previous, bucketWidth)
+            previous = bucket
+
+    def range(self):
+        buckets = self.buckets + ([self.partial] if self.partial is not None else [])
+        if not buckets:
+            return None
+
+        return min(low for bucket, low, high in buckets), max(high for bucket, low, high in buckets)
+
+
+class TrendPlot(QWidget):
+    refreshInterval = 2
+    margins = (60, 16, 8, 16)
+    legendWidth = 130
+    legendHeight = 12
+
+    def __init__(self, history, curves, logScale=False, span=spans['24h']):
+        QWidget.__init__(self)
+        self.history = history
+        self.curves = curves
+        self.logScale = logScale
+        self.span = span
+        self.bucketWidth = None
+
+        self.setMinimumHeight(180)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.setFont(theme.font(styles.smallFont))
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+
+    @property
+    def plotRect(self):
+        left, top, right, bottom = TrendPlot.margins
+        return QRectF(left, top, max(1, self.width() - left - right), max(1, self.height() - top - bottom))
+
+    def scale(self, values):
+        return np.log10(values) if self.logScale else values
+
+    def setSpan(self, span):
+        self.span = span
+        self.reset()
+
+    def reset(self):
+        # bucket boundaries depend on span and width, everything has to be bucketed again.
+        self.bucketWidth = self.span / self.plotRect.width()
+        for curve in self.curves:
+            curve.reset()
+
+        self.refresh()
+
+    def refresh(self):
+        if self.bucketWidth is None:
+            return
+
+        currentBucket = int(time.time() // self.bucketWidth)
+        self.firstBucket = currentBucket - int(self.plotRect.width())
+
+        for curve in self.curves:
+            curve.update(self.history, self.bucketWidth, self.firstBucket, currentBucket, self.scale)
+
+        self.update()
+
+    def showEvent(self, event):
+        self.reset()
+        self.timer.start(int(TrendPlot.refreshInterval * 1000))
+        QWidget.showEvent(self, event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        QWidget.hideEvent(self, event)
+
+    def resizeEvent(self, event):
+        QWidget.resizeEvent(self, event)
+        if self.isVisible():
+            self.reset()
+
+    def yRange(self):
+        ranges = [curve.range() for curve in self.curves]
+        ranges = [yRange for yRange in ranges if yRange is not None]
+        if not ranges:
+            return None
+
+        low, high = min(low for low, high in ranges), max(high for low, high in ranges)
+        pad = 0.05 * (high - low) if high > low else max(abs(high) * 0.01, 0.5)
+
+        return low - pad, high + pad
+
+    def formatValue(self, value):
+        return '%.2e' % 10 ** value if self.logScale else '%.4g' % value
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        rect = self.plotRect
+        painter.fillRect(rect, Qt.white)
+        painter.setPen(QColor('gray'))
+        painter.drawRect(rect)
+
+        span = '-%dh' % (self.span // 3600)
+        painter.drawText(QRectF(rect.left(), rect.bottom(), rect.width(), 16), Qt.AlignLeft, span)
+        painter.drawText(QRectF(rect.left(), rect.bottom(), rect.width(), 16), Qt.AlignRight, 'now')
+
+        yRange = self.yRange()
+        if yRange is None or self.bucketWidth is None:
+            return
+
+        low, high = yRange
+        painter.drawText(QRectF(0, rect.top() - 6, rect.left() - 4, 12), Qt.AlignRight, self.formatValue(high))
+        painter.drawText(QRectF(0, rect.bottom() - 6, rect.left() - 4, 12), Qt.AlignRight, self.formatValue(low))
+
+        # (bucket, value) to pixels, the paths are never rebuilt for drawing.
+        transform = QTransform()
+        transform.translate(rect.left(), rect.bottom())
+        transform.scale(1, -rect.height() / (high - low))
+        transform.translate(-self.firstBucket, -low)
+
+        painter.setClipRect(rect)
+        nRows = max(1, int(rect.height() - 4) // TrendPlot.legendHeight)
+
+        for i, curve in enumerate(self.curves):
+            pen = QPen(curve.color)
+            pen.setCosmetic(True)
+            pen.setWidthF(1.2)
+            painter.setPen(pen)
+
+            painter.setTransform(transform)
+            painter.drawPath(curve.path)
+
+            if curve.partial is not None:
+                partial = QPainterPath()
+                curve.lineTo(partial, *curve.partial, previous=None, bucketWidth=self.bucketWidth)
+                if curve.buckets:
+                    partial.moveTo(curve.buckets[-1][0], curve.buckets[-1][2])
+                    partial.lineTo(curve.partial[0], curve.partial[1])
+                painter.drawPath(partial)
+
+            painter.resetTransform()
+            legend = QRectF(rect.left() + 4 + TrendPlot.legendWidth * (i // nRows),
+                            rect.top() + 2 + TrendPlot.legendHeight * (i % nRows), TrendPlot.legendWidth,
+                            TrendPlot.legendHeight)
+            painter.drawText(legend, Qt.AlignLeft, curve.label)
+
+
+class TrendPanel(QGroupBox):
+    def __init__(self, moduleRow, series, title='Trends', logScale=False):
+        QGroupBox.__init__(self)
+        self.setTitle(title)
+        self.moduleRow = moduleRow
+
+        registerTrends(moduleRow, series)
+        curves = [Curve((moduleRow.actorName, key, ind), label, styles.trendColors[i % len(styles.trendColors)])
+                  for i, (key, ind, label) in enumerate(series)]
+
+        self.plot = TrendPlot(moduleRow.mwindow.history, curves, logScale=logScale)
+        self.span = ComboBox()
+        self.span.addItems(list(spans))
+        self.span.setCurrentText('24h')
+        self.span.currentTextChanged.connect(lambda text: self.plot.setSpan(spans[text]))
+
+        self.grid = GridLayout()
+        self.grid.setContentsMargins(2, 8, 2, 2)
+        self.grid.addWidget(self.span, 0, 1)
+        self.grid.addWidget(self.plot, 1, 0, 1, 2)
+        self.grid.setColumnStretch(0, 1)
+        self.setLayout(self.grid)
+
+
+class Sparkline(object):
+    """ Recent history of a tile, painted behind its value. Only complete buckets are drawn, so the tile is only
+    repainted when one more pixel column is available, which is checked once per bucket while the tile is visible. """
+    color = QColor(0, 0, 0, 70)
+
+    def __init__(self, widget, seriesKey, span=spans['1h'], logScale=False):
+        self.widget = widget
+        self.history = widget.moduleRow.mwindow.history
+        self.curve = Curve(seriesKey, '', Sparkline.color)
+        self.span = span
+        self.logScale = logScale
+        self.bucketWidth = None
+        self.transform = None
+
+        self.pen = QPen(self.curve.color)
+        self.pen.setCosmetic(True)
+
+        # a steady value is not rendered again, the window still has to move on.
+        self.timer = QTimer(widget)
+        self.timer.timeout.connect(self.refresh)
+
+    def scale(self, values):
+        return np.log10(values) if self.logScale else values
+
+    def reset(self):
+        self.bucketWidth = self.span / max(1, self.widget.width())
+        self.timer.setInterval(int(self.bucketWidth * 1000))
+        self.curve.reset()
+        self.refresh()
+
+    def start(self):
+        if self.bucketWidth is None:
+            self.reset()
+        else:
+            self.refresh()
+
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+
+    def refresh(self):
+        if self.bucketWidth is None:
+            return
+
+        lastBucket = self.curve.lastBucket
+        currentBucket = int(time.time() // self.bucketWidth)
+        firstBucket = currentBucket - self.widget.width()
+        self.curve.update(self.history, self.bucketWidth, firstBucket, currentBucket, self.scale)
+
+        if self.curve.lastBucket == lastBucket and self.transform is not None:
+            return
+
+        # everything but the path drawing is done here, once per new bucket rather than once per paint.
+        self.transform = None
+        yRange = self.curve.range() if self.curve.buckets else None
+
+        if yRange is not None:
+            low, high = yRange
+            high = high if high > low else low + 1
+            rect = self.widget.value.geometry()
+
+            self.transform = QTransform()
+            self.transform.translate(rect.left(), rect.bottom() - 2)
+            self.transform.scale(1, -(rect.height() - 4) / (high - low))
+            self.transform.translate(-firstBucket, -low)
+
+        self.widget.update()
+
+    def paint(self, painter):
+        if self.transform is None:
+            return
+
+        painter.setPen(self.pen)
+        painter.setTransform(self.transform)
+        painter.drawPath(self.curve.path)
@@ -1,20 +1,107 @@
 __author__ = 'alefur'
 
-from functools import partial
-
 import spsGUIActor.styles as styles
-from PyQt5.QtCore import QTimer
-from PyQt5.QtWidgets import QLabel, QGroupBox, QMessageBox
+import spsGUIActor.theme as theme
+from PyQt5.QtCore import QTimer, Qt, QRect, QSize
+from PyQt5.QtGui import QPainter, QColor, QFontMetrics
+from PyQt5.QtWidgets import QLabel, QGroupBox, QMessageBox, QWidget, QSizePolicy
 from spsGUIActor.common import PushButton, DoubleSpinBox, SpinBox, GridLayout, GBoxGrid
+from spsGUIActor.fanout import keyVarValues
+from spsGUIActor.trend import Sparkline
 
 convertText = {'on': 'ON', 'off': 'OFF', 'nan': 'nan', 'undef': 'undef', 'pending': 'OFF'}
 
 
-class ValueGB(QGroupBox):
+class KeyValue(object):
+    """ One value of a keyword, formatted and rendered through the frame scheduler. Colours are given by the text,
+    unless the actor is offline, the keyword stale or an alarm raised, in that order. """
+    coalesce = True
+    lastRendered = None
+    isStale = False
+    alarm = None
+    isDerived = False
+
+    def watchKeyvar(self, callNow=False):
+        mwindow = self.moduleRow.mwindow
+        mwindow.history.register(self.keyvar, self.ind)
+        mwindow.staleness.track(self.keyvar, self)
+        mwindow.alarms.watch(self.keyvar, self, self.ind)
+        # widgets built lazily with their dialog need to catch up with the current value.
+        self.subscribe(callNow=callNow or self.keyvar.isCurrent)
+
+    def subscribe(self, callNow):
+        self.moduleRow.mwindow.fanout.subscribe(self.keyvar, self, callNow=callNow)
+
+    def updateVals(self, values):
+        self.setValue(values[self.ind])
+
+    def setValue(self, value):
+        try:
+            strValue = self.fmt.format(value)
+        except TypeError:
+            strValue = 'nan'
+
+        self.moduleRow.mwindow.frameScheduler.push(self, strValue)
+
+    def refresh(self, strValue):
+        self.setText(strValue)
+        self.lastRendered = self.renderKey(strValue)
+
+    def renderKey(self, strValue):
+        # text, style and online flag, styles being derived from the text.
+        return strValue, self.moduleRow.isOnline
+
+    def customize(self):
+        self.setColor(*self.getStyles(self.valueText()))
+        self.setEnabled(self.moduleRow.isOnline)
+
+    def getStyles(self, text):
+        try:
+            background, police = styles.colorWidget(text)
+        except KeyError:
+            background, police = styles.colorWidget('default')
+
+        return background, police
+
+    def setEnabled(self, isOnline):
+        if not isOnline:
+            self.setColor(*styles.colorWidget('offline'))
+            # painted over, the next value needs to be rendered whatever it is.
+            self.lastRendered = None
+        elif self.isStale:
+            self.setColor(*styles.colorWidget('stale'))
+        elif self.alarm is not None:
+            self.setColor(*styles.colorWidget(self.alarm))
+
+    def setStale(self, isStale):
+        self.isStale = isStale
+        self.restyle()
+
+    def setAlarm(self, severity):
+        self.alarm = severity
+        self.restyle()
+
+    def restyle(self):
+        # a cleared flag needs the colours of the text back, the value itself may never be pushed again.
+        self.lastRendered = None
+
+        if self.valueText():
+            self.customize()
+        else:
+            self.setEnabled(self.moduleRow.isOnline)
+
+
+class ValueGB(KeyValue, QGroupBox):
+    sparkline = None
+    frameScheduler = None
+
     def __init__(self, moduleRow, key, title, ind, fmt, fontSize=styles.smallFont, callNow=False):
         self.moduleRow = moduleRow
+        self.frameScheduler = moduleRow.mwindow.frameScheduler
         self.keyvar = moduleRow.keyVarDict[key]
         self.title = title
+        self.ind = ind
+        self.fmt = fmt
         self.fontSize = fontSize
 
         QGroupBox.__init__(self)
@@ -25,62 +112,199 @@ class ValueGB(QGroupBox):
         self.value = QLabel()
         self.grid.addWidget(self.value, 0, 0)
         self.setLayout(self.grid)
+        self.initTheme()
 
-        self.cb = partial(self.updateVals, ind, fmt)
-        self.keyvar.addCallback(self.cb, callNow=callNow)
+        self.watchKeyvar(callNow=callNow)
 
-    def __del__(self):
-        self.keyvar.removeCallback(self.cb)
+    def valueText(self):
+        return self.value.text()
 
-    def updateVals(self, ind, fmt, keyvar):
-        values = keyvar.getValue(doRaise=False)
-        values = (values,) if not isinstance(values, tuple) else values
+    def refresh(self, strValue):
+        KeyValue.refresh(self, strValue)
 
-        value = values[ind]
+        if self.sparkline is not None:
+            self.sparkline.refresh()
 
-        try:
-            strValue = fmt.format(value)
-        except TypeError:
-            strValue = 'nan'
+    def showSparkline(self, logScale=False):
+        if self.moduleRow.mwindow.sparklines:
+            self.sparkline = Sparkline(self, (self.keyvar.actor, self.keyvar.name, self.ind), logScale=logScale)
 
-        self.setText(strValue)
-        self.moduleRow.mwindow.heartBeat()
+    def showEvent(self, event):
+        QGroupBox.showEvent(self, event)
+        # values received while hidden are rendered before the first paint.
+        if self.frameScheduler is not None:
+            self.frameScheduler.reveal(self)
+        if self.sparkline is not None:
+            self.sparkline.start()
+
+    def hideEvent(self, event):
+        QGroupBox.hideEvent(self, event)
+        if self.sparkline is not None:
+            self.sparkline.stop()
+
+    def resizeEvent(self, event):
+        QGroupBox.resizeEvent(self, event)
+        if self.sparkline is not None:
+            self.sparkline.reset()
+
+    def paintEvent(self, event):
+        QGroupBox.paintEvent(self, event)
+        if self.sparkline is not None:
+            self.sparkline.paint(QPainter(self))
+
+    def initTheme(self):
+        theme.apply(self, theme='true', fontPt='%d' % theme.groupBoxFont(self.fontSize))
+        self.value.setAlignment(Qt.AlignCenter)
+        self.value.setFont(theme.font(self.fontSize))
 
     def setBackground(self, background):
-        col1, col2 = styles.colormap(background)
-        bckColor = 'qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1, stop: 0  %s, stop: 1 %s)' % (col1, col2)
-        fontSize = max(8, round(0.85 * self.fontSize))
-        self.setStyleSheet(
-            "QGroupBox {font-size: %ipt; background-color: %s ;border: 1px solid gray;border-radius: 3px;margin-top: 1ex;} "%(fontSize, bckColor)+
-            "QGroupBox::title {subcontrol-origin: margin;subcontrol-position: top center; padding: 0 0px;}")
-        return bckColor
+        theme.apply(self, background=background)
 
     def setColor(self, background, police='white'):
         self.setBackground(background=background)
-        self.value.setStyleSheet(
-            "QLabel{font-size: %ipt; qproperty-alignment: AlignCenter; color:%s;}" % (self.fontSize, police))
+        theme.setPolice(self.value, police)
 
     def setText(self, txt):
         self.value.setText(txt)
         self.customize()
 
-    def customize(self):
-        background, police = self.getStyles(self.value.text())
 
-        self.setColor(background=background, police=police)
-        self.setEnabled(self.moduleRow.isOnline)
+class ValueCell(KeyValue):
+    """ Same as a ValueGB, but painted by its ValueGrid instead of being a group box, a layout and a label. """
 
-    def getStyles(self, text):
-        try:
-            background, police = styles.colorWidget(text)
-        except KeyError:
-            background, police = styles.colorWidget('default')
+    def __init__(self, valueGrid, key, title, ind, fmt, callNow=False):
+        self.valueGrid = valueGrid
+        self.moduleRow = valueGrid.moduleRow
+        self.keyvar = self.moduleRow.keyVarDict[key]
+        self.title = title
+        self.ind = ind
+        self.fmt = fmt
+        self.text = ''
+        self.background, self.police = styles.colorWidget('default')
+        self.rect = QRect()
 
-        return background, police
+        self.watchKeyvar(callNow=callNow)
+
+    def valueText(self):
+        return self.text
+
+    def isVisible(self):
+        return self.valueGrid.isVisible()
+
+    def setColor(self, background, police='white'):
+        if (background, police) == (self.background, self.police):
+            return
+
+        self.background, self.police = background, police
+        self.valueGrid.update(self.rect)
+
+    def setText(self, txt):
+        if txt != self.text:
+            self.text = txt
+            self.valueGrid.update(self.rect)
+
+        self.customize()
+
+
+class ValueGrid(QWidget):
+    """ Grid of ValueCell, with one font, one set of metrics and one geometry pass for all of them. """
+    spacing = 2
+    padding = 6
+
+    def __init__(self, moduleRow, fontSize=styles.smallFont):
+        QWidget.__init__(self)
+        self.moduleRow = moduleRow
+        self.cells = []
+        self.positions = dict()
+        self.nRows = 0
+        self.nColumns = 0
+
+        self.titleFont = theme.font(theme.groupBoxFont(fontSize))
+        self.valueFont = theme.font(fontSize)
+        self.titleMetrics = QFontMetrics(self.titleFont)
+        self.valueMetrics = QFontMetrics(self.valueFont)
+        self.cellWidth = 0
+        self.cellHeight = self.titleMetrics.height() + self.valueMetrics.height() + 2 * ValueGrid.padding
+        self.border = QColor('gray')
+        self.polices = dict()
+
+        self.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Fixed)
+
+    def addCell(self, cell, row, column):
+        self.cells.append(cell)
+        self.positions[cell] = (row, column)
+        self.nRows = max(self.nRows, row + 1)
+        self.nColumns = max(self.nColumns, column + 1)
+        self.cellWidth = max(self.cellWidth, self.titleMetrics.horizontalAdvance(cell.title) + 2 * ValueGrid.padding)
+
+        self.updateGeometry()
+        self.layoutCells()
+
+    def sizeHint(self):
+        return QSize(self.nColumns * (self.cellWidth + ValueGrid.spacing),
+                     self.nRows * (self.cellHeight + ValueGrid.spacing))
+
+    def minimumSizeHint(self):
+        return self.sizeHint()
+
+    def layoutCells(self):
+        width = self.width() / max(1, self.nColumns)
+        height = self.cellHeight + ValueGrid.spacing
+
+        for cell, (row, column) in self.positions.items():
+            cell.rect = QRect(int(column * width), row * height, int(width) - ValueGrid.spacing, self.cellHeight)
+
+        self.update()
+
+    def resizeEvent(self, event):
+        QWidget.resizeEvent(self, event)
+        self.layoutCells()
+
+    def showEvent(self, event):
+        QWidget.showEvent(self, event)
+        frameScheduler = self.moduleRow.mwindow.frameScheduler
+
+        for cell in self.cells:
+            frameScheduler.reveal(cell)
+
+    def police(self, police):
+        if police not in self.polices:
+            self.polices[police] = QColor(police)
+
+        return self.polices[police]
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        titleHeight = self.titleMetrics.height()
+        window = self.palette().window()
+
+        for cell in self.cells:
+            if not cell.rect.intersects(event.rect()):
+                continue
+
+            # same look as a themed group box, the title sitting on the top border.
+            box = cell.rect.adjusted(0, titleHeight // 2, -1, -1)
+            painter.setPen(self.border)
+            painter.setBrush(theme.brush(cell.background))
+            painter.drawRoundedRect(box, 3, 3)
+
+            titleRect = QRect(cell.rect.left(), cell.rect.top(), cell.rect.width(), titleHeight)
+            titleWidth = self.titleMetrics.horizontalAdvance(cell.title)
+            if titleWidth:
+                painter.fillRect(titleRect.center().x() - titleWidth // 2 - 1, titleRect.top(), titleWidth + 2,
+                                 titleHeight // 2 + 1, window)
+
+            painter.setFont(self.titleFont)
+            painter.setPen(self.police('black'))
+            painter.drawText(titleRect, Qt.AlignCenter, cell.title)
+
+            painter.setFont(self.valueFont)
+            painter.setPen(self.police(cell.police))
+            painter.drawText(box.adjusted(0, titleHeight // 2, 0, 0), Qt.AlignCenter, cell.text)
 
     def setEnabled(self, isOnline):
-        if not isOnline:
-            self.setColor(*styles.colorWidget('offline'))
+        for cell in self.cells:
+            cell.setEnabled(isOnline)
 
 
 class ValuesRow(QGroupBox):
@@ -95,9 +319,9 @@ class ValuesRow(QGroupBox):
         self.setLayout(self.grid)
         self.grid.setContentsMargins(1, 4, 1, 1)
         self.setStyleSheet(
-            "QGroupBox {font-size: %ipt; border: 1px solid #d7d4d1;border-radius: 3px;margin-top: 0.5ex;} " % (
+            "ValuesRow {font-size: %ipt; border: 1px solid #d7d4d1;border-radius: 3px;margin-top: 0.5ex;} " % (
                 fontSize) +
-            "QGroupBox::title {subcontrol-origin: margin;subcontrol-position: top center; padding: 0 3px;}")
+            "ValuesRow::title {subcontrol-origin: margin;subcontrol-position: top center; padding: 0 3px;}")
 
     def setEnabled(self, a0: bool):
         QGroupBox.setEnabled(self, a0)
@@ -257,10 +481,6 @@ class SwitchGB(ValueGB):
     def __init__(self, moduleRow, key, title, ind, fmt, fontSize=styles.smallFont):
         self.moduleRow = moduleRow
         ValueGB.__init__(self, moduleRow, key=key, title=title, ind=ind, fmt=fmt, fontSize=fontSize)
-        fontSize = max(8, round(0.85 * fontSize))
-        self.setStyleSheet(
-            "QGroupBox {font-size: %ipt; border: 1px solid #d7d4d1;border-radius: 3px;margin-top: 1ex;} " % fontSize +
-            "QGroupBox::title {subcontrol-origin: margin;subcontrol-position: top center; padding: 0 3px;}")
 
     def setText(self, txt):
         try:
@@ -272,17 +492,9 @@ class SwitchGB(ValueGB):
         self.customize()
 
 
-class CriticalSwitchGB(SwitchGB):
-    def __init__(self, *args, **kwargs):
-        SwitchGB.__init__(self, *args, **kwargs)
-
-    def getStyles(self, text):
-        background, police = SwitchGB.getStyles(self, text)
-        background = 'red' if text.lower() == 'off' else background
-        return background, police
-
-
 class SwitchButton(SwitchGB):
+    coalesce = False
+
     def __init__(self, controlPanel, key, label, cmdHead, ind=0, fmt='{:g}', cmdStrOn='', cmdStrOff='', labelOn='ON',
                  labelOff='OFF', safetyCheck=False):
 
@@ -342,20 +554,45 @@ class CustomedCmd(GridLayout):
 
 class Controllers(ValueGB):
     def __init__(self, moduleRow):
+        self.available = set()
+        self.index = None
         ValueGB.__init__(self, moduleRow, 'controllers', 'Controllers', 0, '{:s}', fontSize=styles.bigFont)
         QTimer.singleShot(5000, self.updateWidgets)
 
-    def updateVals(self, ind, fmt, keyvar):
-        self.updateWidgets(keyvar.getValue(doRaise=False))
+    def updateVals(self, values):
+        if self.index is None:
+            self.updateWidgets()
+            return
+
+        available = set(values)
+        # only the widgets depending on a controller which appeared or disappeared are touched.
+        changed, self.available = available ^ self.available, available
+
+        for controllerName in changed:
+            for widget in self.index.get(controllerName, []):
+                widget.setEnabled(controllerName in available)
 
-    def updateWidgets(self, controllers=None):
-        controllers = self.keyvar.getValue(doRaise=False) if controllers is None else controllers
+    def buildIndex(self):
+        self.index = dict()
 
         for widget in self.moduleRow.widgets + self.moduleRow.controlDialog.pannels:
             if not widget.controllerName:
                 continue
 
-            widget.setEnabled(widget.controllerName in controllers)
+            self.index.setdefault(widget.controllerName, []).append(widget)
+
+    def updateWidgets(self):
+        # rows create their dialog last, the sweep is run again from ModuleRow.createDialog.
+        if getattr(self.moduleRow, 'controlDialog', None) is None:
+            return
+
+        # full sweep, the index needs to be rebuilt anyway once the dialog panels exist.
+        self.available = set(keyVarValues(self.keyvar))
+        self.buildIndex()
+
+        for controllerName, widgets in self.index.items():
+            for widget in widgets:
+                widget.setEnabled(controllerName in self.available)
 
 
 class ValueMRow(ValueGB):